@@ -4,15 +4,46 @@ Embedded WhiteboardFox browser + auto draw trainer.
 Does not use system Chrome/Firefox.
 """
 
+import argparse
+import base64
+import csv
+import concurrent.futures
+import hashlib
+import importlib.util
+import json
+import math
 import os
+import queue
+import resource
+import struct
 import sys
-from dataclasses import dataclass
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime
 from urllib.parse import urlparse
 
-import cv2
-from PyQt6.QtCore import QEvent, QTimer, Qt, QUrl
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QFile,
+    QFileSystemWatcher,
+    QIODevice,
+    QModelIndex,
+    QObject,
+    QPointF,
+    QRunnable,
+    QThread,
+    QThreadPool,
+    QTimer,
+    Qt,
+    QUrl,
+    pyqtSignal,
+    pyqtSlot,
+)
+from PyQt6.QtGui import QImage, QImageReader, QMouseEvent, QPixmap
 from PyQt6.QtWidgets import (
     QApplication,
     QComboBox,
@@ -24,10 +55,10 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QLineEdit,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QMainWindow,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSizePolicy,
     QSlider,
@@ -35,19 +66,74 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtWebEngineCore import (
     QWebEnginePage,
     QWebEngineProfile,
+    QWebEngineScript,
     QWebEngineSettings,
     QWebEngineUrlRequestInterceptor,
 )
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 
 
+def lazy_import(name):
+    # Module whose real import runs on first attribute access (cv2 and numpy
+    # cost a good part of cold start and only the draw pipeline needs them).
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
 TARGET_URL = "https://r9.whiteboardfox.com/"
 ALLOWED_DOMAIN = "whiteboardfox.com"
 CHROMEBOOK_DOWNLOADS = "/mnt/chromeos/MyFiles/Downloads"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_BOARD_HTML = os.path.join(APP_DIR, "bench", "board.html")
 PROFILE_DIR = os.path.expanduser("~/.local/share/whiteboardfox-autodraw/profile")
+PLAN_CACHE_DIR = os.path.expanduser("~/.local/share/whiteboardfox-autodraw/plans")
+PLAN_CACHE_BUDGET_MB = int(os.environ.get("WBF_PLAN_CACHE_MB", "256"))
+METRICS_LOG_DIR = os.path.expanduser("~/.local/share/whiteboardfox-autodraw/logs")
+# Running draw job (plan + progress cursor) for resume after a crash/reload.
+JOB_DIR = os.path.expanduser("~/.local/share/whiteboardfox-autodraw/job")
+JOB_CHECKPOINT_S = 5.0
+# Image picker previews: decoded off the UI thread at THUMB_SIZE (longest
+# side), kept on disk (LRU, WBF_THUMB_CACHE_MB) and as ready pixmaps in memory.
+THUMB_CACHE_DIR = os.path.expanduser("~/.local/share/whiteboardfox-autodraw/thumbs")
+THUMB_CACHE_BUDGET_MB = int(os.environ.get("WBF_THUMB_CACHE_MB", "64"))
+THUMB_SIZE = 640
+THUMB_MEMORY_ITEMS = 48
+THUMB_PREFETCH = 4
+# Set to a .csv or .jsonl path to stream draw metrics from startup.
+METRICS_LOG_ENV = "WBF_METRICS_LOG"
+# One JSON line of cold-start marks per launch.
+STARTUP_LOG = os.path.join(METRICS_LOG_DIR, "startup.jsonl")
+# One JSON line per quality governor transition.
+GOVERNOR_LOG = os.path.join(METRICS_LOG_DIR, "governor.jsonl")
+# Build stages timed for the stats panel, in pipeline order.
+METRICS_STAGES = (
+    "cache", "decode", "resize", "colors", "canny", "thin", "tiles", "contours", "stitch", "hatch",
+    "simplify", "order", "upload",
+)
+# Bump when extraction output changes so stale cached plans stop matching.
+# The current values of the PLAN_TUNING constants (defined further down) are
+# part of the cache key too, so retuning one of them needs no bump.
+PLAN_FORMAT_VERSION = 2
+PLAN_TUNING = (
+    "CENTERLINE_MERGE_PX", "CENTERLINE_MIN_LENGTH_PX", "CENTERLINE_HOLE_PX", "CENTERLINE_HOLE_SIDE_PX",
+    "HATCH_LAYERS", "HATCH_MIN_RUN_SPACINGS", "COLOR_SAMPLE_SIDE", "COLOR_SKIP_LUMA",
+    "EXTRACT_WORKERS", "TILE_MIN_PIXELS", "TILE_OVERLAP_PX", "STROKE_JOIN_GAP_PX", "ORDER_2OPT_BUDGET_S",
+    "STREAM_FIRST_BATCH", "STREAM_BATCH", "STREAM_BAND_PX",
+)
 ALLOWED_TOP_LEVEL_SUFFIXES = (
     ".whiteboardfox.com",
     ".google.com",
@@ -101,6 +187,140 @@ FAST_MODE_ALLOWED_EXACT = {
     "myaccount.google.com",
     "apis.google.com",
 }
+# Host lists as (exact hosts, suffixes), compiled into HOST_RULES. A JSON file
+# named by WBF_HOST_RULES, {"ad_tracker": {"exact": [...], "suffixes": [...]}},
+# replaces the lists it names.
+DEFAULT_HOST_RULES = {
+    "whiteboardfox": (("whiteboardfox.com",), (".whiteboardfox.com",)),
+    "google": (("google.com",), (".google.com",)),
+    "ad_tracker": ((), AD_TRACKER_HOST_SUFFIXES),
+    "fast_mode_allowed": (tuple(FAST_MODE_ALLOWED_EXACT), FAST_MODE_ALLOWED_SUFFIXES),
+}
+HOST_RULES_ENV = "WBF_HOST_RULES"
+HOST_CACHE_SIZE = 4096
+# Player rate per speed preset in points/sec; 0 = as many as fit in a frame.
+SPEED_PRESETS = {
+    "Slow": 28,
+    "Normal": 55,
+    "Fast": 110,
+    "Very Fast": 200,
+    "Max": 0,
+}
+# Board view zoom (the "Low-Res" toggle drops it to LOWRES_ZOOM). Zones are
+# CSS px, so --board runs use the same zoom and a fixed viewport to line them up.
+BOARD_ZOOM = 0.9
+LOWRES_ZOOM = 0.72
+HEADLESS_VIEWPORT = (1280, 720)
+# The page pushes player progress through the QWebChannel bridge every
+# PLAYER_POLL_MS (and on state changes); Python only polls when a page has no
+# bridge. RTT_PROBE_MS paces the runJavaScript round-trip probe that feeds
+# the adaptive rate controller.
+PLAYER_POLL_MS = 150
+RTT_PROBE_MS = 1000
+# Input backends: synthetic DOM events fired by the in-page player, or native
+# QMouseEvents sent to the view (NativeStrokePlayer), which go through
+# Chromium's input pipeline like real mouse input.
+INPUT_BACKENDS = {"JS events": "js", "Native": "native"}
+NATIVE_TICK_MS = 8
+NATIVE_TICK_BUDGET_MS = 4.0
+# Quality governor ("Auto" button): every GOVERNOR_INTERVAL_MS it reads page
+# health and renderer CPU/RSS and steps through GOVERNOR_LEVELS (name, "Perf:
+# Fast" filter, zoom, draw rate scale). GOVERNOR_HOT_SAMPLES busy samples in a
+# row step up, GOVERNOR_CALM_SAMPLES quiet ones step down. "Max" speed has no
+# rate to scale, so it gets GOVERNOR_FRAME_POINTS * scale points per frame.
+GOVERNOR_INTERVAL_MS = 2000
+GOVERNOR_LEVELS = (
+    ("normal", False, BOARD_ZOOM, 1.0),
+    ("filtered", True, BOARD_ZOOM, 1.0),
+    ("low-res", True, LOWRES_ZOOM, 1.0),
+    ("slower draw", True, LOWRES_ZOOM, 0.6),
+    ("slowest draw", True, LOWRES_ZOOM, 0.35),
+)
+GOVERNOR_HOT_SAMPLES = 2
+GOVERNOR_CALM_SAMPLES = 5
+GOVERNOR_HOT_FRAME_MS = 50.0
+GOVERNOR_CALM_FRAME_MS = 25.0
+GOVERNOR_HOT_LONG_TASK = 0.25
+GOVERNOR_CALM_LONG_TASK = 0.05
+GOVERNOR_HOT_CPU = 0.85
+GOVERNOR_CALM_CPU = 0.5
+GOVERNOR_RSS_MB = int(os.environ.get("WBF_GOVERNOR_RSS_MB", "1200"))
+GOVERNOR_FRAME_POINTS = 200
+# Renderer memory watchdog: every WATCHDOG_INTERVAL_MS it checks the board
+# renderer's RSS; past WBF_RENDERER_RSS_MB (0 = off) the page is swapped for
+# a fresh one once the board has had no input for WATCHDOG_IDLE_S (a running
+# draw is paused and resumed from its checkpoint). The new renderer's RSS is
+# measured WATCHDOG_SETTLE_MS after it has loaded.
+RENDERER_RSS_LIMIT_MB = int(os.environ.get("WBF_RENDERER_RSS_MB", "1500"))
+WATCHDOG_INTERVAL_MS = 5000
+WATCHDOG_IDLE_S = 10
+WATCHDOG_SETTLE_MS = 3000
+# Pens: extra off-screen pages on the same profile that join the board and
+# each draw one spatial band of the plan. run.sh allows three renderer
+# processes, so up to three pens draw in parallel. A pen that has not
+# answered a poll within PEN_POLL_TIMEOUT_MS (page reloading or gone) is
+# merged at its last report instead of holding up the others.
+PEN_CHOICES = {"1 pen": 1, "2 pens": 2, "3 pens": 3}
+PEN_POLL_TIMEOUT_MS = 1000
+# Points per stroke-plan upload call (int16 x/y pairs, base64 encoded).
+PLAYER_CHUNK_POINTS = 65536
+# "Adaptive" speed: hold the runJavaScript round trip and the page's frame
+# time under these targets, spending at most ADAPTIVE_FRAME_WORK_MS per frame
+# on firing events.
+ADAPTIVE_TARGET_RTT_MS = 60.0
+ADAPTIVE_TARGET_FRAME_MS = 25.0
+ADAPTIVE_FRAME_WORK_MS = 6.0
+ADAPTIVE_MIN_RATE = 20.0
+ADAPTIVE_MAX_RATE = 6000.0
+# Stroke extraction: "outline" traces both sides of every Canny edge as a
+# closed loop; "centerline" thins the edge map and traces each line once.
+EXTRACT_MODES = {"Outline": "outline", "Centerline": "centerline"}
+# Centerline: parallel edges closer than this (px) are closed into one band
+# before thinning; strokes with a free end shorter than the minimum length
+# (spurs, specks) are dropped. Where lines cross, the band can enclose a
+# pocket of ink; pockets up to CENTERLINE_HOLE_PX px (and at most
+# CENTERLINE_HOLE_SIDE_PX across) that are darker than the paper are filled
+# so the crossing thins to a junction, not a tiny loop (paper pockets, like
+# the inside of a small "o", are kept).
+CENTERLINE_MERGE_PX = 5
+CENTERLINE_MIN_LENGTH_PX = 6
+CENTERLINE_HOLE_PX = 120
+CENTERLINE_HOLE_SIDE_PX = 10
+# Fill mode hatch layers: (gray level below which to hatch, angle in
+# degrees, line spacing in px). Darker tones collect more layers, ending in
+# a cross-hatch. Only regions at least one spacing across are hatched (the
+# mask is opened with a spacing-sized kernel, so line art gets none), and
+# runs shorter than HATCH_MIN_RUN_SPACINGS spacings are skipped.
+HATCH_LAYERS = ((200, 45, 9), (140, 135, 7), (80, 0, 5))
+HATCH_MIN_RUN_SPACINGS = 2
+# Colour mode: "N colors" quantises the image into N layers drawn one after
+# another with a single board colour switch each. k-means runs on a copy no
+# larger than COLOR_SAMPLE_SIDE px; layers at least this light are skipped
+# as background.
+COLOR_CHOICES = {"Mono": 0, "4 colors": 4, "6 colors": 6, "8 colors": 8}
+COLOR_SAMPLE_SIDE = 160
+COLOR_SKIP_LUMA = 235
+# Tiled extraction: zones of at least TILE_MIN_PIXELS are split into one
+# tile per worker thread (WBF_EXTRACT_WORKERS, default: all cores), each
+# with TILE_OVERLAP_PX of context on every side (enough for a filled
+# centerline pocket plus the band's border, and for thinning to agree with
+# an untiled run at the seam).
+EXTRACT_WORKERS = max(1, int(os.environ.get("WBF_EXTRACT_WORKERS", os.cpu_count() or 1)))
+TILE_MIN_PIXELS = 640 * 480
+TILE_OVERLAP_PX = 24
+# Simplify slider works in tenths of a pixel.
+SIMPLIFY_DEFAULT_TENTHS = 10
+SIMPLIFY_MAX_TENTHS = 50
+# Pen-up jumps longer than this count as "long" in the ordering report.
+LONG_JUMP_PX = 60
+# Strokes whose ends touch (8-neighbour) are drawn as one stroke.
+STROKE_JOIN_GAP_PX = 1
+ORDER_2OPT_BUDGET_S = 1.0
+# Extraction streams strokes to the player in horizontal bands: a small first
+# batch so drawing starts right away, then larger ones.
+STREAM_FIRST_BATCH = 256
+STREAM_BATCH = 4096
+STREAM_BAND_PX = 64
 
 
 @dataclass
@@ -127,14 +347,85 @@ class DrawZone:
         return abs(self.y2 - self.y1)
 
 
+class HostMatcher:
+    # All host lists compiled into two dicts: exact host -> list names and
+    # domain -> list names for suffix rules. A lookup probes each parent
+    # domain of the host once (a.b.c -> b.c -> c) instead of scanning every
+    # suffix, and the answer is memoised per host in a bounded LRU. The
+    # request interceptor calls this from Qt's IO thread, hence the lock.
+    def __init__(self, rules, cache_size=HOST_CACHE_SIZE):
+        self._exact = {}
+        self._suffix = {}
+        for name, (exact, suffixes) in rules.items():
+            for host in exact:
+                self._exact.setdefault(host.lower().strip("."), set()).add(name)
+            for suffix in suffixes:
+                self._suffix.setdefault(suffix.lower().strip("."), set()).add(name)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.blocked = 0
+
+    def classify(self, host):
+        # frozenset of the list names host belongs to.
+        host = host.lower().strip().rstrip(".")
+        with self._lock:
+            found = self._cache.get(host)
+            if found is not None:
+                self._cache.move_to_end(host)
+                self.hits += 1
+                return found
+            self.misses += 1
+        names = set(self._exact.get(host, ()))
+        dot = host.find(".")
+        while dot >= 0:
+            names.update(self._suffix.get(host[dot + 1:], ()))
+            dot = host.find(".", dot + 1)
+        found = frozenset(names)
+        with self._lock:
+            self._cache[host] = found
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def matches(self, host, name):
+        return name in self.classify(host)
+
+    def count_block(self):
+        with self._lock:
+            self.blocked += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hosts": len(self._cache), "hits": self.hits, "misses": self.misses, "blocked": self.blocked}
+
+
+def load_host_rules(path=None):
+    rules = dict(DEFAULT_HOST_RULES)
+    if not path:
+        return rules
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for name, rule in data.items():
+            rules[name] = (tuple(rule.get("exact", ())), tuple(rule.get("suffixes", ())))
+    except (OSError, ValueError, AttributeError) as exc:
+        print(f"Ignoring {HOST_RULES_ENV}={path}: {exc}", file=sys.stderr)
+        return dict(DEFAULT_HOST_RULES)
+    return rules
+
+
+HOST_RULES = HostMatcher(load_host_rules(os.environ.get(HOST_RULES_ENV)))
+
+
 def is_google_host(host: str) -> bool:
-    host = host.lower().strip()
-    return host == "google.com" or host.endswith(".google.com")
+    return HOST_RULES.matches(host, "google")
 
 
 def is_whiteboardfox_host(host: str) -> bool:
-    host = host.lower().strip()
-    return host == "whiteboardfox.com" or host.endswith(".whiteboardfox.com")
+    return HOST_RULES.matches(host, "whiteboardfox")
 
 
 def is_allowed_google_auth_url(url_s: str) -> bool:
@@ -159,6 +450,1230 @@ def is_allowed_main_frame_host(host: str) -> bool:
     return bool((host or "").strip())
 
 
+def _lap(timings, stage, t0):
+    # Adds the ms since t0 to timings[stage] (if timing) and returns a new t0.
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - t0) * 1000.0
+    return now
+
+
+def _jpeg_size(f):
+    # Walk the marker segments up to the first start-of-frame.
+    f.seek(2)
+    while True:
+        b = f.read(1)
+        while b and b != b"\xff":
+            b = f.read(1)
+        while b == b"\xff":
+            b = f.read(1)
+        if not b:
+            return None
+        marker = b[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            h, w = struct.unpack(">xHH", f.read(5))
+            return w, h
+        f.seek(length - 2, 1)
+
+
+def probe_image_size(path):
+    # (width, height) from the file header without decoding any pixels, for
+    # the formats the image picker lists; None if unrecognised.
+    try:
+        with open(path, "rb") as f:
+            head = f.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head.startswith(b"\xff\xd8"):
+                return _jpeg_size(f)
+            if head.startswith(b"BM"):
+                w, h = struct.unpack("<ii", head[18:26])
+                return w, abs(h)
+            if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8X":
+                    return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+                if chunk == b"VP8L":
+                    bits = int.from_bytes(head[21:25], "little")
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b"VP8 ":
+                    w, h = struct.unpack("<HH", head[26:30])
+                    return w & 0x3FFF, h & 0x3FFF
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+# Decoder downscale factor -> imread flag. For JPEG, libjpeg scales the DCT
+# itself, so the full-size image is never materialised.
+# (Names, so cv2 stays unloaded until the first decode.)
+REDUCED_GRAY_FLAGS = {
+    8: "IMREAD_REDUCED_GRAYSCALE_8",
+    4: "IMREAD_REDUCED_GRAYSCALE_4",
+    2: "IMREAD_REDUCED_GRAYSCALE_2",
+    1: "IMREAD_GRAYSCALE",
+}
+REDUCED_COLOR_FLAGS = {
+    8: "IMREAD_REDUCED_COLOR_8",
+    4: "IMREAD_REDUCED_COLOR_4",
+    2: "IMREAD_REDUCED_COLOR_2",
+    1: "IMREAD_COLOR",
+}
+
+
+def decode_for_zone(image_path: str, width: int, height: int, color=False):
+    # Decode at the smallest scale that still covers the zone, so time and
+    # memory follow the zone size rather than the file size.
+    flags = REDUCED_COLOR_FLAGS if color else REDUCED_GRAY_FLAGS
+    size = probe_image_size(image_path)
+    room = min(size[0] / width, size[1] / height) if size else 1
+    factors = [f for f in flags if f <= room or f == 1]
+    for factor in factors:
+        img = cv2.imread(image_path, getattr(cv2, flags[factor]))
+        if img is None:
+            raise RuntimeError("Could not load image.")
+        # EXIF rotation can swap the axes; decode less reduced if it no longer covers.
+        if factor == 1 or (img.shape[1] >= width and img.shape[0] >= height):
+            return img
+    return img
+
+
+def zone_image(image_path: str, width: int, height: int, timings=None, color=False):
+    # The source image at zone size: grayscale, or BGR with color=True.
+    t = time.perf_counter()
+    img = decode_for_zone(image_path, width, height, color)
+    t = _lap(timings, "decode", t)
+    shrinking = img.shape[1] > width or img.shape[0] > height
+    img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR)
+    _lap(timings, "resize", t)
+    return img
+
+
+def split_tiles(width, height, workers=EXTRACT_WORKERS):
+    # Core rectangles (x0, y0, x1, y1), about one per worker on a near-square grid;
+    # empty when the zone is too small for tiling to pay off.
+    if workers < 2 or width * height < TILE_MIN_PIXELS:
+        return []
+    cols = max(1, min(workers, round(math.sqrt(workers * width / height))))
+    rows = max(1, math.ceil(workers / cols))
+    xs = np.linspace(0, width, cols + 1).astype(int)
+    ys = np.linspace(0, height, rows + 1).astype(int)
+    return [(xs[c], ys[r], xs[c + 1], ys[r + 1]) for r in range(rows) for c in range(cols)]
+
+
+_tile_pool = None
+_tile_pool_lock = threading.Lock()
+
+
+def tile_pool():
+    # OpenCV releases the GIL in Canny/findContours/morphology, so threads
+    # scale across cores without pickling tiles to worker processes.
+    # Extractor threads can race here on first use; only one pool is made.
+    global _tile_pool
+    with _tile_pool_lock:
+        if _tile_pool is None:
+            _tile_pool = concurrent.futures.ThreadPoolExecutor(EXTRACT_WORKERS, thread_name_prefix="wbf-tile")
+    return _tile_pool
+
+
+def _with_margin(gray, tile):
+    # The tile plus TILE_OVERLAP_PX of context, and the core's offset in it.
+    h, w = gray.shape
+    x0, y0, x1, y1 = tile
+    mx0, my0 = max(0, x0 - TILE_OVERLAP_PX), max(0, y0 - TILE_OVERLAP_PX)
+    mx1, my1 = min(w, x1 + TILE_OVERLAP_PX), min(h, y1 + TILE_OVERLAP_PX)
+    return gray[my0:my1, mx0:mx1], (x0 - mx0, y0 - my0)
+
+
+def _seam_hits(pts, tile, width, height):
+    # Points lying on an inner tile border.
+    x0, y0, x1, y1 = tile
+    x, y = pts[:, 0], pts[:, 1]
+    return (
+        ((x == x0) & (x0 > 0)) | ((x == x1 - 1) & (x1 < width))
+        | ((y == y0) & (y0 > 0)) | ((y == y1 - 1) & (y1 < height))
+    )
+
+
+def _contour_tile(gray, tile, width, height):
+    # Canny sees the margin (so hysteresis and the Sobel window run across
+    # the seam) but contours are traced on the core only. Contours that reach
+    # the seam are not kept: their edge components are returned as a mask of
+    # the core instead, to be traced again once every tile is in.
+    region, (cx, cy) = _with_margin(gray, tile)
+    x0, y0, x1, y1 = tile
+    edges = cv2.Canny(region, 100, 200)
+    core = np.ascontiguousarray(edges[cy:cy + y1 - y0, cx:cx + x1 - x0])
+    contours, _ = cv2.findContours(core, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return [], None
+    contours = [c.reshape(-1, 2) for c in contours]
+    origin = np.array([x0, y0], dtype=np.int32)
+    # Seam test on all points at once.
+    offsets = np.cumsum([0] + [len(c) for c in contours])
+    seam = _seam_hits(np.concatenate(contours) + origin, tile, width, height)
+    touches = np.add.reduceat(seam, offsets[:-1]) > 0
+    if not touches.any():
+        return [c + origin for c in contours if len(c) >= 2], None
+    for k in np.flatnonzero(touches).tolist():
+        x, y = contours[k][0]
+        if core[y, x] == 255:
+            # Contour points are edge pixels; mark the whole component.
+            cv2.floodFill(core, None, (int(x), int(y)), 128, flags=8)
+    # Hole contours of a marked component go with it.
+    closed = [c + origin for c in contours if len(c) >= 2 and core[c[0, 1], c[0, 0]] == 255]
+    return closed, core == 128
+
+
+def trace_contours(gray, timings=None, workers=EXTRACT_WORKERS):
+    height, width = gray.shape
+    tiles = split_tiles(width, height, workers)
+    t = time.perf_counter()
+    if not tiles:
+        edges = cv2.Canny(gray, 100, 200)
+        t = _lap(timings, "canny", t)
+        contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        out = [c.reshape(-1, 2) for c in contours if len(c) >= 2]
+        _lap(timings, "contours", t)
+        return out
+    results = list(tile_pool().map(lambda tile: _contour_tile(gray, tile, width, height), tiles))
+    t = _lap(timings, "tiles", t)
+    out = [c for closed, _seam in results for c in closed]
+    # Components cut by a seam are reassembled and traced whole, so their
+    # contours come out as they would untiled (as trace_centerlines does).
+    seam = np.zeros((height, width), np.uint8)
+    for (x0, y0, x1, y1), (_closed, part) in zip(tiles, results):
+        if part is not None:
+            seam[y0:y1, x0:x1][part] = 255
+    contours, _ = cv2.findContours(seam, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    out += [c.reshape(-1, 2) for c in contours if len(c) >= 2]
+    _lap(timings, "stitch", t)
+    return out
+
+
+def _neighbour_ring(img):
+    # The 8 neighbours of every interior pixel, clockwise from north.
+    return (
+        img[:-2, 1:-1], img[:-2, 2:], img[1:-1, 2:], img[2:, 2:],
+        img[2:, 1:-1], img[2:, :-2], img[1:-1, :-2], img[:-2, :-2],
+    )
+
+
+def _crossings(ring):
+    # 0 -> 1 transitions around the ring: 1 at a line end, 2 along a line
+    # (staircase corners included), 3+ at a junction.
+    return sum((ring[i] == 0) & (ring[(i + 1) % 8] == 1) for i in range(8))
+
+
+def _zhang_suen_thin(mask):
+    # Vectorised Zhang-Suen: both sub-iterations peel boundary pixels whose
+    # removal keeps the shape 8-connected, until nothing changes.
+    img = np.pad((mask > 0).astype(np.uint8), 1)
+    while True:
+        changed = False
+        for first in (True, False):
+            ring = _neighbour_ring(img)
+            p2, _p3, p4, _p5, p6, _p7, p8, _p9 = ring
+            b = sum(ring)
+            if first:
+                c = (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0)
+            else:
+                c = (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)
+            kill = (img[1:-1, 1:-1] == 1) & (b >= 2) & (b <= 6) & (_crossings(ring) == 1) & c
+            if kill.any():
+                img[1:-1, 1:-1][kill] = 0
+                changed = True
+        if not changed:
+            return img[1:-1, 1:-1]
+
+
+def thin_edges(mask):
+    # opencv-contrib ships a C++ thinning; plain opencv falls back to numpy.
+    ximgproc = getattr(cv2, "ximgproc", None)
+    if ximgproc is not None:
+        thin = ximgproc.thinning((mask > 0).astype(np.uint8) * 255, thinningType=ximgproc.THINNING_ZHANGSUEN)
+        return (thin > 0).astype(np.uint8)
+    return _zhang_suen_thin(mask)
+
+
+def _drop_collinear(pts):
+    # Same idea as CHAIN_APPROX_SIMPLE: keep only the points where the step
+    # direction changes (plus both ends).
+    if len(pts) < 3:
+        return pts
+    d = np.diff(pts, axis=0)
+    turn = np.any(d[1:] != d[:-1], axis=1)
+    keep = np.concatenate(([True], turn, [True]))
+    return pts[keep]
+
+
+def trace_skeleton(skel, min_length=CENTERLINE_MIN_LENGTH_PX):
+    # Splits a one-pixel skeleton into open polylines. Nodes are line ends
+    # and junctions (crossing number != 2); each run of line pixels between
+    # nodes becomes one stroke that includes both nodes, so branches meet at
+    # their junction. Node-free rings come out as closed strokes. Strokes not
+    # anchored at junctions on both ends (spurs, specks, short isolated bits)
+    # are dropped below min_length px.
+    h, w = skel.shape
+    stride = w + 2
+    padded = np.pad((skel > 0).astype(np.uint8), 2)
+    cross_img = np.zeros_like(padded)
+    cross_img[1:-1, 1:-1] = _crossings(_neighbour_ring(padded)) * padded[1:-1, 1:-1]
+    padded, cross_img = padded[1:-1, 1:-1], cross_img[1:-1, 1:-1]
+    on = padded.tobytes()
+    cross = cross_img.tobytes()
+    visited = bytearray(len(on))
+    # 4-neighbours first so staircase corners are walked, not skipped.
+    steps = (-stride, 1, stride, -1, -stride + 1, stride + 1, stride - 1, -stride - 1)
+    strokes = []
+
+    nodes = (padded.ravel() == 1) & (cross_img.ravel() != 2)
+    for s in np.flatnonzero(nodes).tolist():
+        for d in steps:
+            cur = s + d
+            if not on[cur] or cross[cur] != 2 or visited[cur]:
+                continue
+            path, prev = [s], s
+            while True:
+                path.append(cur)
+                if cross[cur] != 2:
+                    break
+                visited[cur] = 1
+                nxt = -1
+                for d2 in steps:
+                    m = cur + d2
+                    if on[m] and m != prev and (cross[m] != 2 or not visited[m]):
+                        nxt = m
+                        if cross[m] == 2:
+                            break
+                if nxt < 0:
+                    break
+                prev, cur = cur, nxt
+            strokes.append(path)
+
+    for s in np.flatnonzero(cross_img.ravel() == 2).tolist():
+        if visited[s]:
+            continue
+        visited[s] = 1
+        path, cur = [s], s
+        while True:
+            nxt = next((cur + d for d in steps if on[cur + d] and not visited[cur + d]), -1)
+            if nxt < 0:
+                break
+            visited[nxt] = 1
+            path.append(nxt)
+            cur = nxt
+        if cur - s in steps:
+            path.append(s)
+        strokes.append(path)
+
+    out = []
+    for path in strokes:
+        idx = np.array(path, dtype=np.int64)
+        pts = np.stack([idx % stride - 1, idx // stride - 1], axis=1).astype(np.int32)
+        if len(pts) < 2:
+            continue
+        anchored = cross[path[0]] >= 3 and cross[path[-1]] >= 3
+        if not anchored:
+            length = float(np.hypot(*np.diff(pts, axis=0).T).sum())
+            if length < min_length:
+                continue
+        out.append(_drop_collinear(pts))
+    return out
+
+
+def centerline_skeleton(gray):
+    # Canny puts an edge on both sides of a line; close the gap between the
+    # two sides, fill small enclosed ink pockets (line crossings) and thin to
+    # a one-pixel skeleton.
+    edges = cv2.Canny(gray, 100, 200)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (CENTERLINE_MERGE_PX, CENTERLINE_MERGE_PX))
+    band = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(255 - band, connectivity=4)
+    area = stats[:, cv2.CC_STAT_AREA]
+    ink = np.bincount(labels.ravel(), weights=gray.ravel(), minlength=n) < 128 * area
+    # Pockets near the border are left alone: the band differs there between
+    # a tile and the whole image, while a small pocket further in is decided
+    # the same way in both.
+    side = np.maximum(stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT])
+    fill = ink & (area <= CENTERLINE_HOLE_PX) & (side <= CENTERLINE_HOLE_SIDE_PX)
+    fill[0] = False
+    m = CENTERLINE_MERGE_PX
+    frame = (labels[:m], labels[-m:], labels[:, :m].T, labels[:, -m:].T)
+    fill[np.concatenate([f.ravel() for f in frame])] = False
+    band[fill[labels]] = 255
+    return thin_edges(band)
+
+
+def _skeleton_tile(gray, tile):
+    region, (cx, cy) = _with_margin(gray, tile)
+    x0, y0, x1, y1 = tile
+    return centerline_skeleton(region)[cy:cy + y1 - y0, cx:cx + x1 - x0]
+
+
+def trace_centerlines(gray, timings=None, workers=EXTRACT_WORKERS):
+    # Thinning is the slow part and is local, so with tiles it runs per tile
+    # (with overlap) and the skeleton is traced once, whole, so junctions
+    # on a seam are still seen as junctions.
+    height, width = gray.shape
+    t = time.perf_counter()
+    tiles = split_tiles(width, height, workers)
+    if tiles:
+        skel = np.zeros((height, width), np.uint8)
+        parts = tile_pool().map(lambda tile: (tile, _skeleton_tile(gray, tile)), tiles)
+        for (x0, y0, x1, y1), part in parts:
+            skel[y0:y1, x0:x1] = part
+        t = _lap(timings, "tiles", t)
+    else:
+        skel = centerline_skeleton(gray)
+        t = _lap(timings, "thin", t)
+    out = trace_skeleton(skel)
+    _lap(timings, "contours", t)
+    return out
+
+
+def _hatch_runs(mask, angle_deg, spacing):
+    # Rotates the mask so hatch lines run along rows, takes every spacing-th
+    # row and finds its runs from the row diff (all rows in one pass), then
+    # maps run endpoints back. Alternate rows run in opposite directions.
+    h, w = mask.shape
+    inv = None
+    if angle_deg % 180:
+        m = cv2.getRotationMatrix2D((w / 2, h / 2), angle_deg, 1.0)
+        cos, sin = abs(m[0, 0]), abs(m[0, 1])
+        rw, rh = int(h * sin + w * cos) + 1, int(h * cos + w * sin) + 1
+        m[0, 2] += rw / 2 - w / 2
+        m[1, 2] += rh / 2 - h / 2
+        mask = cv2.warpAffine(mask, m, (rw, rh), flags=cv2.INTER_NEAREST)
+        inv = cv2.invertAffineTransform(m)
+    rows = np.arange(spacing // 2, mask.shape[0], spacing)
+    lines = np.zeros((len(rows), mask.shape[1] + 2), np.int8)
+    lines[:, 1:-1] = mask[rows] > 0
+    d = np.diff(lines, axis=1)
+    r, x0 = np.nonzero(d == 1)
+    _r, x1 = np.nonzero(d == -1)
+    x1 -= 1
+    keep = x1 - x0 + 1 >= HATCH_MIN_RUN_SPACINGS * spacing
+    r, x0, x1 = r[keep], x0[keep], x1[keep]
+    odd = (r % 2) == 1
+    xs, xe = np.where(odd, x1, x0), np.where(odd, x0, x1)
+    y = rows[r]
+    pts = np.stack([xs, y, xe, y], axis=1).reshape(-1, 2).astype(np.float64)
+    if inv is not None:
+        pts = pts @ inv[:, :2].T + inv[:, 2]
+    pts = np.rint(pts).astype(np.int32)
+    np.clip(pts[:, 0], 0, w - 1, out=pts[:, 0])
+    np.clip(pts[:, 1], 0, h - 1, out=pts[:, 1])
+    return list(pts.reshape(-1, 2, 2))
+
+
+def hatch_strokes(gray, timings=None):
+    # Fill mode: straight two-point hatch strokes over dark regions, one
+    # layer per HATCH_LAYERS entry so darker tones get denser cross-hatching.
+    t = time.perf_counter()
+    smooth = cv2.GaussianBlur(gray, (5, 5), 0)
+    out = []
+    for level, angle, spacing in HATCH_LAYERS:
+        mask = (smooth < level).astype(np.uint8)
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (spacing, spacing))
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        if mask.any():
+            out += _hatch_runs(mask, angle, spacing)
+    _lap(timings, "hatch", t)
+    return out
+
+
+def _strokes_from_gray(gray, mode, timings, workers, fill, tone=None):
+    if mode == "centerline":
+        strokes = trace_centerlines(gray, timings, workers)
+    else:
+        strokes = trace_contours(gray, timings, workers)
+    if fill:
+        strokes += hatch_strokes(gray if tone is None else tone, timings)
+    return strokes
+
+
+def trace_strokes(image_path: str, width: int, height: int, mode="outline", timings=None,
+                  workers=EXTRACT_WORKERS, fill=False):
+    gray = zone_image(image_path, width, height, timings)
+    return _strokes_from_gray(gray, mode, timings, workers, fill)
+
+
+def quantize_colors(bgr, n_colors):
+    # k-means in Lab on a downscaled copy (vectorised in OpenCV), then every
+    # zone pixel takes its nearest centre. Returns (labels, BGR centres).
+    h, w = bgr.shape[:2]
+    scale = min(1.0, COLOR_SAMPLE_SIDE / max(h, w))
+    small = cv2.resize(bgr, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    samples = cv2.cvtColor(small, cv2.COLOR_BGR2Lab).reshape(-1, 3).astype(np.float32)
+    n_colors = min(n_colors, len(samples))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+    cv2.setRNGSeed(1)
+    _compactness, _labels, centers = cv2.kmeans(samples, n_colors, None, criteria, 2, cv2.KMEANS_PP_CENTERS)
+    lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2Lab).reshape(-1, 3).astype(np.float32)
+    # |x - c|^2 = |x|^2 - 2 x.c + |c|^2; |x|^2 is the same for every centre.
+    bias = (centers * centers).sum(axis=1)
+    labels = np.empty(len(lab), np.uint8)
+    for i in range(0, len(lab), 1 << 18):
+        block = lab[i:i + (1 << 18)]
+        labels[i:i + len(block)] = np.argmin(bias - 2.0 * block @ centers.T, axis=1)
+    # Median filter merges speckle so photos give regions, not dust.
+    labels = cv2.medianBlur(labels.reshape(h, w), 5)
+    bgr_centers = cv2.cvtColor(np.clip(centers, 0, 255).astype(np.uint8)[None], cv2.COLOR_Lab2BGR)[0]
+    return labels, bgr_centers
+
+
+def trace_layers(image_path: str, width: int, height: int, mode="outline", timings=None,
+                 workers=EXTRACT_WORKERS, fill=False, colors=0):
+    # [(color or None, strokes)]. With colors, one layer per quantised colour,
+    # lightest first so darker lines end up on top; colours close to the
+    # white board are skipped.
+    if not colors:
+        return [(None, trace_strokes(image_path, width, height, mode, timings, workers, fill))]
+    bgr = zone_image(image_path, width, height, timings, color=True)
+    t = time.perf_counter()
+    labels, centers = quantize_colors(bgr, colors)
+    _lap(timings, "colors", t)
+    luma = centers.astype(np.float32) @ np.array([0.114, 0.587, 0.299], np.float32)
+    layers = []
+    for k in np.argsort(-luma):
+        if luma[k] >= COLOR_SKIP_LUMA:
+            continue
+        mask = labels == k
+        if not mask.any():
+            continue
+        # Outlines come from the binary region; hatching follows the colour's tone.
+        region = np.where(mask, 0, 255).astype(np.uint8)
+        tone = np.where(mask, int(luma[k]), 255).astype(np.uint8)
+        b, g, r = (int(v) for v in centers[k])
+        strokes = _strokes_from_gray(region, mode, timings, workers, fill, tone)
+        if strokes:
+            layers.append((f"#{r:02x}{g:02x}{b:02x}", strokes))
+    return layers
+
+
+def simplify_paths(contours, tolerance: float):
+    # Ramer-Douglas-Peucker (approxPolyDP) drops the long runs of nearly
+    # collinear 1 px steps that CHAIN_APPROX_SIMPLE leaves on photos.
+    if tolerance <= 0:
+        return contours
+    out = []
+    for c in contours:
+        pts = cv2.approxPolyDP(c, tolerance, False).reshape(-1, 2)
+        if len(pts) >= 2:
+            out.append(pts)
+    return out
+
+
+def count_points(paths) -> int:
+    return sum(len(p) for p in paths)
+
+
+def count_steps(paths) -> int:
+    # Player steps: one per point plus the pen-up at the end of each stroke.
+    return count_points(paths) + len(paths)
+
+
+def pen_up_travel(paths, origin=(0, 0)):
+    if not paths:
+        return 0.0, 0
+    starts = np.array([p[0] for p in paths], dtype=np.float64)
+    ends = np.array([p[-1] for p in paths], dtype=np.float64)
+    prev = np.vstack([np.asarray(origin, dtype=np.float64), ends[:-1]])
+    jumps = np.hypot(starts[:, 0] - prev[:, 0], starts[:, 1] - prev[:, 1])
+    return float(jumps.sum()), int((jumps > LONG_JUMP_PX).sum())
+
+
+@dataclass
+class OrderStats:
+    strokes_before: int = 0
+    strokes_after: int = 0
+    travel_before: float = 0.0
+    travel_after: float = 0.0
+    long_jumps_before: int = 0
+    long_jumps_after: int = 0
+    steps_saved: int = 0
+    seconds: float = 0.0
+
+
+class _EndpointGrid:
+    # Uniform grid over stroke start/end points for nearest-endpoint queries.
+    def __init__(self, starts, ends, cell):
+        self.cell = cell
+        self.cells = {}
+        for i in range(len(starts)):
+            for x, y in (starts[i], ends[i]):
+                key = (int(x // cell), int(y // cell))
+                bucket = self.cells.setdefault(key, [])
+                if not bucket or bucket[-1] != i:
+                    bucket.append(i)
+
+    def key(self, x, y):
+        return int(x // self.cell), int(y // self.cell)
+
+    @staticmethod
+    def ring(cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for x in range(cx - r, cx + r + 1):
+            yield x, cy - r
+            yield x, cy + r
+        for y in range(cy - r + 1, cy + r):
+            yield cx - r, y
+            yield cx + r, y
+
+    def near(self, x, y, radius=1):
+        cx, cy = self.key(x, y)
+        for r in range(radius + 1):
+            for k in self.ring(cx, cy, r):
+                bucket = self.cells.get(k)
+                if bucket:
+                    yield from bucket
+
+
+def _nearest_neighbour_order(starts, ends, cell, origin):
+    n = len(starts)
+    grid = _EndpointGrid(starts, ends, cell)
+    visited = np.zeros(n, dtype=bool)
+    order = np.empty(n, dtype=np.int64)
+    rev = np.zeros(n, dtype=bool)
+    x, y = float(origin[0]), float(origin[1])
+    for step in range(n):
+        best, best_d, best_rev = -1, math.inf, False
+        cx, cy = grid.key(x, y)
+        r = 0
+        while r <= 6:
+            for k in grid.ring(cx, cy, r):
+                bucket = grid.cells.get(k)
+                if not bucket:
+                    continue
+                live = [i for i in bucket if not visited[i]]
+                if len(live) != len(bucket):
+                    grid.cells[k] = live
+                for i in live:
+                    ds = math.hypot(starts[i][0] - x, starts[i][1] - y)
+                    de = math.hypot(ends[i][0] - x, ends[i][1] - y)
+                    if ds < best_d:
+                        best, best_d, best_rev = i, ds, False
+                    if de < best_d:
+                        best, best_d, best_rev = i, de, True
+            # Anything in ring r+1 is at least r*cell away.
+            if best >= 0 and best_d <= r * cell:
+                break
+            r += 1
+        if best < 0:
+            # Neighbourhood exhausted: vectorised scan of what is left.
+            left = np.flatnonzero(~visited)
+            ds = np.hypot(starts[left, 0] - x, starts[left, 1] - y)
+            de = np.hypot(ends[left, 0] - x, ends[left, 1] - y)
+            i_s, i_e = int(np.argmin(ds)), int(np.argmin(de))
+            if de[i_e] < ds[i_s]:
+                best, best_rev = int(left[i_e]), True
+            else:
+                best, best_rev = int(left[i_s]), False
+        visited[best] = True
+        order[step] = best
+        rev[step] = best_rev
+        x, y = (starts[best] if best_rev else ends[best])
+    return order, rev
+
+
+def _two_opt(starts, ends, order, rev, cell, origin, deadline):
+    # Segment reversal also flips stroke direction, so the move is:
+    #   ... a | b ... j | k ...  ->  ... a | j' ... b' | k ...
+    n = len(order)
+    pos = np.empty(n, dtype=np.int64)
+    pos[order] = np.arange(n)
+    grid = _EndpointGrid(starts, ends, cell)
+    ox, oy = float(origin[0]), float(origin[1])
+
+    def entry(p):
+        i = order[p]
+        return ends[i] if rev[p] else starts[i]
+
+    def exit_(p):
+        i = order[p]
+        return starts[i] if rev[p] else ends[i]
+
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for a in range(-1, n - 2):
+            ax, ay = exit_(a) if a >= 0 else (ox, oy)
+            bx, by = entry(a + 1)
+            d_ab = math.hypot(bx - ax, by - ay)
+            if d_ab <= STROKE_JOIN_GAP_PX:
+                continue
+            for s in grid.near(ax, ay):
+                j = int(pos[s])
+                if j <= a + 1:
+                    continue
+                jx, jy = exit_(j)
+                old = d_ab
+                new = math.hypot(jx - ax, jy - ay)
+                if j + 1 < n:
+                    kx, ky = entry(j + 1)
+                    old += math.hypot(kx - jx, ky - jy)
+                    new += math.hypot(kx - bx, ky - by)
+                if new + 1e-6 < old:
+                    seg = slice(a + 1, j + 1)
+                    order[seg] = order[seg][::-1].copy()
+                    rev[seg] = ~rev[seg][::-1]
+                    pos[order[seg]] = np.arange(a + 1, j + 1)
+                    improved = True
+                    break
+            if (a & 255) == 0 and time.monotonic() >= deadline:
+                break
+    return order, rev
+
+
+def _join_touching(paths):
+    out = []
+    pieces = []
+    for p in paths:
+        if pieces:
+            gap = np.abs(pieces[-1][-1] - p[0]).max()
+            if gap == 0:
+                pieces.append(p[1:])
+                continue
+            if gap <= STROKE_JOIN_GAP_PX:
+                pieces.append(p)
+                continue
+            out.append(np.concatenate(pieces) if len(pieces) > 1 else pieces[0])
+        pieces = [p]
+    if pieces:
+        out.append(np.concatenate(pieces) if len(pieces) > 1 else pieces[0])
+    return out
+
+
+def order_strokes(paths, origin=(0, 0), budget_s=ORDER_2OPT_BUDGET_S):
+    # Nearest-neighbour tour over stroke endpoints (strokes may be drawn
+    # reversed), refined by 2-opt on grid neighbours, then strokes that end
+    # where the next one starts are joined to save a pen-up/pen-down pair.
+    t0 = time.monotonic()
+    stats = OrderStats(strokes_before=len(paths))
+    stats.travel_before, stats.long_jumps_before = pen_up_travel(paths, origin)
+    if len(paths) < 2:
+        stats.strokes_after = len(paths)
+        stats.travel_after, stats.long_jumps_after = stats.travel_before, stats.long_jumps_before
+        return list(paths), stats
+
+    starts = np.array([p[0] for p in paths], dtype=np.float64)
+    ends = np.array([p[-1] for p in paths], dtype=np.float64)
+    lo = np.minimum(starts.min(axis=0), ends.min(axis=0))
+    hi = np.maximum(starts.max(axis=0), ends.max(axis=0))
+    area = float(max(1.0, (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1)))
+    cell = max(4.0, math.sqrt(area / len(paths)))
+
+    order, rev = _nearest_neighbour_order(starts, ends, cell, origin)
+    order, rev = _two_opt(starts, ends, order, rev, cell, origin, t0 + budget_s)
+    ordered = [paths[i][::-1] if r else paths[i] for i, r in zip(order.tolist(), rev.tolist())]
+    joined = _join_touching(ordered)
+
+    stats.strokes_after = len(joined)
+    stats.travel_after, stats.long_jumps_after = pen_up_travel(joined, origin)
+    stats.steps_saved = count_steps(paths) - count_steps(joined)
+    stats.seconds = time.monotonic() - t0
+    return joined, stats
+
+
+class StrokePlan:
+    # Flat stroke store: xy holds every point as one (N, 2) int32 array and
+    # stroke i is xy[offsets[i]:offsets[i + 1]]. Far smaller than lists of
+    # tuples, and the zone offset is a single vectorised add. colors lists
+    # (stroke index, "#rrggbb") switches for colour-layered plans.
+    __slots__ = ("xy", "offsets", "colors")
+
+    def __init__(self, xy=None, offsets=None, colors=None):
+        # An empty plan's arrays are made on first use (__getattr__), so the
+        # players built with the window do not load numpy.
+        if xy is not None:
+            self.xy = xy
+        if offsets is not None:
+            self.offsets = offsets
+        self.colors = colors or []
+
+    def __getattr__(self, name):
+        if name == "xy":
+            self.xy = np.zeros((0, 2), dtype=np.int32)
+            return self.xy
+        if name == "offsets":
+            self.offsets = np.zeros(1, dtype=np.int64)
+            return self.offsets
+        raise AttributeError(name)
+
+    @classmethod
+    def from_paths(cls, paths, color=None):
+        if not paths:
+            return cls()
+        lens = np.fromiter((len(p) for p in paths), dtype=np.int64, count=len(paths))
+        offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        xy = np.concatenate([np.asarray(p).reshape(-1, 2) for p in paths]).astype(np.int32, copy=False)
+        return cls(xy, offsets, [(0, color)] if color else None)
+
+    @classmethod
+    def from_lengths(cls, xy, lens, colors=None):
+        offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        return cls(xy.astype(np.int32, copy=False), offsets, colors)
+
+    @classmethod
+    def concat(cls, plans):
+        plans = [p for p in plans if len(p)]
+        if not plans:
+            return cls()
+        if len(plans) == 1:
+            return plans[0]
+        colors = []
+        base = 0
+        for p in plans:
+            for i, color in p.colors:
+                if not colors or colors[-1][1] != color:
+                    colors.append((base + i, color))
+            base += len(p)
+        xy = np.concatenate([p.xy for p in plans])
+        return cls.from_lengths(xy, np.concatenate([p.lengths() for p in plans]), colors)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_points(self):
+        return int(self.offsets[-1])
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def color_at(self, i):
+        color = None
+        for start, c in self.colors:
+            if start > i:
+                break
+            color = c
+        return color
+
+    def slice(self, start, end):
+        # A slice keeps the colour in effect at its first stroke.
+        offsets = self.offsets[start:end + 1]
+        colors = [(i - start, c) for i, c in self.colors if start < i < end]
+        first = self.color_at(start)
+        if first:
+            colors.insert(0, (0, first))
+        return StrokePlan(self.xy[offsets[0]:offsets[-1]], offsets - offsets[0], colors)
+
+    def translated(self, dx, dy):
+        return StrokePlan(self.xy + np.array([dx, dy], dtype=np.int32), self.offsets, self.colors)
+
+    def take(self, ids):
+        # Strokes ids (ascending) as a new plan, with a switch wherever the
+        # colour changes between them.
+        ids = np.asarray(ids, dtype=np.int64)
+        lens = self.lengths()[ids]
+        plan = StrokePlan.from_lengths(np.zeros((0, 2), dtype=np.int32), lens)
+        gather = np.arange(plan.n_points) + np.repeat(self.offsets[ids] - plan.offsets[:-1], lens)
+        plan.xy = self.xy[gather]
+        if self.colors and len(ids):
+            layer = np.searchsorted([i for i, _c in self.colors], ids, side="right") - 1
+            changed = np.flatnonzero(np.diff(layer, prepend=-1))
+            plan.colors = [(int(j), self.colors[layer[j]][1]) for j in changed if layer[j] >= 0]
+        return plan
+
+
+def iter_stroke_batches(contours, tolerance, stats=None, timings=None, color=None,
+                        first_batch=STREAM_FIRST_BATCH, batch_size=STREAM_BATCH):
+    # Yields (contours_done, contours_total, StrokePlan) with strokes
+    # simplified and ordered, still in zone coordinates. Contours are presorted into
+    # serpentine bands so each batch is spatially local and can be ordered on
+    # its own, continuing from where the previous batch ended. Stats add up
+    # over calls (one per colour layer).
+    total = len(contours)
+    if stats is not None:
+        travel, long_jumps = pen_up_travel(contours)
+        stats.strokes_before += total
+        stats.travel_before += travel
+        stats.long_jumps_before += long_jumps
+    if not total:
+        return
+    starts = np.array([c[0] for c in contours])
+    band = starts[:, 1] // STREAM_BAND_PX
+    xkey = np.where(band % 2 == 0, starts[:, 0], -starts[:, 0])
+    idx = np.lexsort((xkey, band))
+    origin = (0, 0)
+    done = 0
+    size = first_batch
+    while done < total:
+        chunk = [contours[k] for k in idx[done:done + size]]
+        t = time.perf_counter()
+        simplified = simplify_paths(chunk, tolerance)
+        t = _lap(timings, "simplify", t)
+        budget = ORDER_2OPT_BUDGET_S * len(chunk) / total
+        ordered, st = order_strokes(simplified, origin, budget_s=budget)
+        _lap(timings, "order", t)
+        if ordered:
+            origin = tuple(ordered[-1][-1])
+        if stats is not None:
+            stats.strokes_after += st.strokes_after
+            stats.travel_after += st.travel_after
+            stats.long_jumps_after += st.long_jumps_after
+            stats.steps_saved += st.steps_saved
+            stats.seconds += st.seconds
+        done += len(chunk)
+        size = batch_size
+        yield done, total, StrokePlan.from_paths(ordered, color)
+
+
+def build_stroke_plan(image_path, width, height, tolerance, stats=None, layers=None, timings=None,
+                      mode="outline", fill=False, colors=0):
+    # Whole pipeline in one go (no streaming); returns the plan in zone
+    # coordinates plus the traced layers for reuse.
+    if layers is None:
+        layers = trace_layers(image_path, width, height, mode, timings, fill=fill, colors=colors)
+    batches = []
+    for color, strokes in layers:
+        batches += [batch for _done, _total, batch in iter_stroke_batches(strokes, tolerance, stats, timings, color)]
+    return StrokePlan.concat(batches), layers
+
+
+def layer_points(layers) -> int:
+    return sum(count_points(strokes) for _color, strokes in layers)
+
+
+def split_plan(plan, n):
+    # n spatial bands (strokes sorted by centre along the wider axis) of about
+    # the same point count. Each band keeps the plan's stroke order; returns
+    # [(band plan, stroke ids)].
+    if n <= 1 or len(plan) < 2:
+        return [(plan, np.arange(len(plan)))] + [(StrokePlan(), np.zeros(0, dtype=np.int64))] * max(0, n - 1)
+    lens = plan.lengths()
+    span = plan.xy.max(axis=0) - plan.xy.min(axis=0)
+    axis = 0 if span[0] >= span[1] else 1
+    centres = np.add.reduceat(plan.xy[:, axis].astype(np.int64), plan.offsets[:-1]) / np.maximum(lens, 1)
+    order = np.argsort(centres, kind="stable")
+    cum = np.cumsum(lens[order])
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, n) / n)
+    bands = []
+    for ids in np.split(order, cuts):
+        ids = np.sort(ids)
+        bands.append((plan.take(ids), ids))
+    return bands
+
+
+def plan_event_count(plan) -> int:
+    # Events the player fires per stroke: move + down, len - 1 moves, up.
+    return plan.n_points + 2 * len(plan)
+
+
+def save_plan(path, plan, stats, meta):
+    # Layout: header, JSON meta (incl. order stats), int32 stroke lengths,
+    # int16 x/y pairs. Written to a temp file first so readers never see a
+    # half-written plan.
+    lens = plan.lengths().astype("<i4")
+    xy = np.clip(plan.xy, -32768, 32767)
+    meta = dict(meta, stats=asdict(stats), colors=plan.colors)
+    blob = json.dumps(meta).encode("utf-8")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack("<4sHII", b"WBFP", PLAN_FORMAT_VERSION, len(lens), len(xy)))
+        f.write(struct.pack("<I", len(blob)))
+        f.write(blob)
+        f.write(lens.tobytes())
+        f.write(xy.astype("<i2").tobytes())
+    os.replace(tmp, path)
+
+
+def load_plan(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, n_strokes, n_points = struct.unpack_from("<4sHII", data, 0)
+    if magic != b"WBFP" or version != PLAN_FORMAT_VERSION:
+        raise ValueError("Unsupported plan file.")
+    off = struct.calcsize("<4sHII")
+    (blob_len,) = struct.unpack_from("<I", data, off)
+    off += 4
+    meta = json.loads(data[off:off + blob_len].decode("utf-8"))
+    off += blob_len
+    lens = np.frombuffer(data, dtype="<i4", count=n_strokes, offset=off)
+    off += 4 * n_strokes
+    xy = np.frombuffer(data, dtype="<i2", count=2 * n_points, offset=off).reshape(-1, 2)
+    plan = StrokePlan.from_lengths(xy, lens, [(int(i), c) for i, c in meta.pop("colors", [])])
+    known = {f.name for f in fields(OrderStats)}
+    stats = OrderStats(**{k: v for k, v in meta.pop("stats", {}).items() if k in known})
+    return plan, stats, meta
+
+
+def trim_lru_dir(root, suffix, budget_bytes):
+    # Oldest mtime first until the *suffix files in root fit the budget.
+    entries = []
+    total = 0
+    with os.scandir(root) as it:
+        for entry in it:
+            if not entry.name.endswith(suffix):
+                continue
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+    entries.sort()
+    for _mtime, size, path in entries:
+        if total <= budget_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+class StrokePlanCache:
+    # On-disk stroke plans keyed by image content, zone size and extraction
+    # settings. Plans are stored in zone coordinates, so moving the zone still
+    # hits. LRU by file mtime (touched on every hit), trimmed to a byte budget.
+    def __init__(self, root=PLAN_CACHE_DIR, budget_bytes=PLAN_CACHE_BUDGET_MB * 1024 * 1024):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def content_digest(self, image_path):
+        st = os.stat(image_path)
+        memo_key = (image_path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            h = hashlib.sha1()
+            with open(image_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+            with self._lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def key(self, image_path, width, height, params):
+        parts = [self.content_digest(image_path), f"{width}x{height}", f"v{PLAN_FORMAT_VERSION}"]
+        parts += [f"{k}={params[k]}" for k in sorted(params)]
+        parts += [f"{name}={globals()[name]!r}" for name in PLAN_TUNING]
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.plan")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            plan, stats, meta = load_plan(path)
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        return plan, stats, meta
+
+    def put(self, key, plan, stats, meta):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            save_plan(self._path(key), plan, stats, meta)
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        trim_lru_dir(self.root, ".plan", self.budget_bytes)
+
+
+class DrawCheckpoint:
+    # The running draw job on disk. The plan (board coordinates) is written
+    # once, when planning finishes; after that only a tiny cursor file is
+    # rewritten every JOB_CHECKPOINT_S, so checkpointing costs next to nothing
+    # while drawing.
+    def __init__(self, root=JOB_DIR):
+        self.root = root
+        self.plan_path = os.path.join(root, "job.plan")
+        self.cursor_path = os.path.join(root, "cursor.json")
+        self.active = False
+        self.saved_at = 0.0
+
+    def save_plan(self, plan, stats, job):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            save_plan(self.plan_path, plan, stats, job)
+        except OSError:
+            return
+        self.active = True
+        self.save_cursor(0, force=True)
+
+    def save_cursor(self, stroke_i, force=False):
+        now = time.monotonic()
+        if not self.active or (not force and now - self.saved_at < JOB_CHECKPOINT_S):
+            return
+        self.saved_at = now
+        tmp = f"{self.cursor_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"stroke": int(stroke_i), "saved": time.time()}, f)
+            os.replace(tmp, self.cursor_path)
+        except OSError:
+            pass
+
+    def load(self):
+        # (plan, stats, job, stroke_i), or None if there is nothing to resume.
+        try:
+            plan, stats, job = load_plan(self.plan_path)
+            with open(self.cursor_path, encoding="utf-8") as f:
+                stroke_i = int(json.load(f)["stroke"])
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+        if not 0 <= stroke_i < len(plan):
+            return None
+        return plan, stats, job, stroke_i
+
+    def clear(self):
+        self.active = False
+        for path in (self.cursor_path, self.plan_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def process_age_ms():
+    # ms since this process was started (interpreter start-up included), from
+    # /proc at clock-tick resolution; 0 where that is unavailable.
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime_s = float(f.read().split()[0])
+        return max(0.0, (uptime_s - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000.0)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupReport:
+    # Cold-start marks (ms since process start): imports done, window built,
+    # first paint, first board loadFinished. Reported once, on the last one.
+    def __init__(self):
+        self.marks = {}
+        self.reported = False
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = round(process_age_ms(), 1)
+
+    def report(self, path=STARTUP_LOG):
+        if self.reported:
+            return
+        self.reported = True
+        print("startup: " + ", ".join(f"{k} {v:.0f} ms" for k, v in self.marks.items()), file=sys.stderr)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                record = {"t": datetime.now().isoformat(timespec="seconds"), **self.marks}
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
+
+STARTUP = StartupReport()
+
+
+class DrawMetrics:
+    # Hot-path numbers behind the stats panel: build stage timings (ms, summed
+    # over batches), poll tick jitter and cost, worker/page queue depth,
+    # throughput and ETA. One sample per player poll, optionally appended to
+    # a CSV or JSONL log (picked by file extension).
+    FIELDS = (
+        "t", "stroke", "strokes", "fired", "steps_per_sec", "eta_s", "rtt_ms",
+        "tick_jitter_ms", "tick_cost_ms", "frame_ms", "frame_jitter_ms", "step_ms",
+        "worker_queue", "page_backlog", *(f"{stage}_ms" for stage in METRICS_STAGES),
+    )
+
+    def __init__(self):
+        self.log_path = None
+        self._log = None
+        self._csv = None
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.sample = {}
+        self.started = time.monotonic()
+        self.last_tick = 0.0
+        self.tick_jitter_ms = 0.0
+        self.tick_cost_ms = 0.0
+
+    def update_stages(self, timings):
+        self.stages.update(timings)
+
+    def tick(self, interval_ms):
+        # Jitter = how far the poll timer fires from its nominal interval.
+        now = time.monotonic()
+        if self.last_tick:
+            late = abs((now - self.last_tick) * 1000.0 - interval_ms)
+            self.tick_jitter_ms = self.tick_jitter_ms * 0.8 + late * 0.2
+        self.last_tick = now
+
+    def add_tick_cost(self, ms):
+        self.tick_cost_ms = self.tick_cost_ms * 0.8 + ms * 0.2
+
+    def record(self, **values):
+        self.sample = dict(
+            values,
+            t=round(time.monotonic() - self.started, 3),
+            tick_jitter_ms=round(self.tick_jitter_ms, 2),
+            tick_cost_ms=round(self.tick_cost_ms, 3),
+        )
+        for stage in METRICS_STAGES:
+            if stage in self.stages:
+                self.sample[f"{stage}_ms"] = round(self.stages[stage], 1)
+        if self._csv is not None:
+            self._csv.writerow(self.sample)
+        elif self._log is not None:
+            self._log.write(json.dumps(self.sample) + "\n")
+
+    def open_log(self, path):
+        self.close_log()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._log = open(path, "a", encoding="utf-8", newline="", buffering=1)
+        if path.lower().endswith(".csv"):
+            self._csv = csv.DictWriter(self._log, fieldnames=self.FIELDS, extrasaction="ignore")
+            if self._log.tell() == 0:
+                self._csv.writeheader()
+        self.log_path = path
+
+    def close_log(self):
+        if self._log is not None:
+            self._log.close()
+        self._log = None
+        self._csv = None
+        self.log_path = None
+
+    def panel_text(self):
+        s = self.sample
+        stages = "  ".join(f"{k} {self.stages[k]:.0f}" for k in METRICS_STAGES if k in self.stages)
+        eta = s.get("eta_s")
+        if eta is None:
+            eta_text = "-"
+        else:
+            eta_text = f"{int(eta // 60)}:{int(eta % 60):02d}" + ("+" if s.get("planning") else "")
+        hosts = HOST_RULES.stats()
+        return "\n".join(
+            [
+                f"Stages (ms)  {stages or '-'}",
+                f"Poll         jitter {self.tick_jitter_ms:.1f} ms  cost {self.tick_cost_ms:.2f} ms"
+                f"  rtt {s.get('rtt_ms', 0):.0f} ms",
+                f"Page         frame {s.get('frame_ms', 0):.1f} ms +/- {s.get('frame_jitter_ms', 0):.1f}"
+                f"  step {s.get('step_ms', 0) * 1000:.0f} us",
+                f"Queue        worker {s.get('worker_queue', 0)} batches  page {s.get('page_backlog', 0):,} pts",
+                f"Throughput   {s.get('steps_per_sec', 0):.0f} events/s  ETA {eta_text}",
+                f"Hosts        {hosts['hosts']} cached  hits {hosts['hits']:,}  misses {hosts['misses']:,}"
+                f"  blocked {hosts['blocked']:,}",
+            ]
+        )
+
+
 def normalize_board_url(raw: str) -> str:
     raw = (raw or "").strip()
     if not raw:
@@ -174,6 +1689,18 @@ def normalize_board_url(raw: str) -> str:
     return parsed.geturl()
 
 
+def open_profile(parent=None):
+    # The persistent login/session profile shared by the window and --board runs.
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile = QWebEngineProfile("whiteboardfox-autodraw", parent)
+    profile.setPersistentStoragePath(PROFILE_DIR)
+    profile.setCachePath(os.path.join(PROFILE_DIR, "cache"))
+    profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+    profile.setHttpCacheMaximumSize(512 * 1024 * 1024)
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+    return profile
+
+
 class LockedPage(QWebEnginePage):
     def __init__(self, profile, app, is_popup=False):
         super().__init__(profile, app.view)
@@ -186,7 +1713,7 @@ class LockedPage(QWebEnginePage):
         # Ignore these placeholders instead of treating them as blocked navigation.
         if is_main_frame and url_s in ("about:blank", "chrome://about", "chrome://about/"):
             return True
-        host = urlparse(url_s).netloc.lower()
+        host = url.host().lower()
         # If a popup lands on a WhiteboardFox room, force it into the main window.
         if is_main_frame and self.is_popup and is_whiteboardfox_host(host):
             self.app.view.setUrl(url)
@@ -214,21 +1741,17 @@ class RequestFilter(QWebEngineUrlRequestInterceptor):
     def set_fast_mode(self, enabled: bool):
         self.fast_mode = bool(enabled)
 
-    def _is_fast_mode_allowed(self, host: str) -> bool:
-        if host in FAST_MODE_ALLOWED_EXACT:
-            return True
-        return any(host.endswith(sfx) for sfx in FAST_MODE_ALLOWED_SUFFIXES)
-
     def interceptRequest(self, info):
-        host = info.requestUrl().host().lower()
-        if not host:
-            return
         # Do not always block ad/tracker domains because some sites detect this
         # as an ad blocker and break auth/session flows.
-        if self.fast_mode and any(host.endswith(sfx) for sfx in AD_TRACKER_HOST_SUFFIXES):
-            info.block(True)
+        if not self.fast_mode:
+            return
+        host = info.requestUrl().host()
+        if not host:
             return
-        if self.fast_mode and not self._is_fast_mode_allowed(host):
+        found = HOST_RULES.classify(host)
+        if "ad_tracker" in found or "fast_mode_allowed" not in found:
+            HOST_RULES.count_block()
             info.block(True)
 
 
@@ -256,6 +1779,1163 @@ class BoardView(QWebEngineView):
         super().mouseReleaseEvent(event)
 
 
+class PathExtractor(QThread):
+    # Traces and plans strokes off the UI thread. Finished batches go through
+    # self.queue; batch_ready only wakes the UI to drain it. With plan=False it
+    # just reports point counts for the simplify readout. Finished plans are
+    # stored in the StrokePlanCache and replayed from it on the next run.
+    batch_ready = pyqtSignal()
+    progress = pyqtSignal(int, str)
+    traced = pyqtSignal(object, object)
+    counted = pyqtSignal(int, int)
+    timed = pyqtSignal(object)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, image_path, zone, tolerance, layers=None, plan=True, cache=None, mode="outline",
+                 fill=False, colors=0, parent=None):
+        super().__init__(parent)
+        self.image_path = image_path
+        self.zone = zone
+        self.tolerance = tolerance
+        self.mode = mode
+        self.fill = fill
+        self.colors = colors
+        self.layers = layers
+        self.plan = plan
+        self.cache = cache
+        self.from_cache = False
+        self.key = (image_path, zone.width, zone.height, mode, fill, colors)
+        self.queue = queue.Queue()
+        # Finish the lazy numpy and cv2 imports here on the UI thread rather
+        # than racing them from the worker and tile threads.
+        getattr(np, "__version__")
+        getattr(cv2, "__version__")
+        # Stage -> ms, emitted (as a copy) through timed.
+        self.timings = {}
+
+    def plan_params(self):
+        return {
+            "tolerance": f"{self.tolerance:.2f}",
+            "mode": self.mode,
+            "fill": int(self.fill),
+            "colors": self.colors,
+        }
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as exc:
+            self.failed.emit(str(exc))
+
+    def _run(self):
+        cache_key = None
+        if self.cache is not None:
+            t = time.perf_counter()
+            cache_key = self.cache.key(self.image_path, self.zone.width, self.zone.height, self.plan_params())
+            hit = self.cache.get(cache_key)
+            _lap(self.timings, "cache", t)
+            if hit is not None:
+                self.timed.emit(dict(self.timings))
+                self._replay_cached(*hit)
+                return
+        layers = self.layers
+        if layers is None:
+            self.progress.emit(0, "Tracing edges")
+            layers = trace_layers(
+                self.image_path, self.zone.width, self.zone.height, self.mode, self.timings,
+                fill=self.fill, colors=self.colors,
+            )
+            self.traced.emit(self.key, layers)
+            self.timed.emit(dict(self.timings))
+        if self.isInterruptionRequested():
+            return
+        before = layer_points(layers)
+        if not self.plan:
+            after = sum(count_points(simplify_paths(strokes, self.tolerance)) for _color, strokes in layers)
+            self.counted.emit(before, after)
+            return
+        stats = OrderStats()
+        local = []
+        total = max(1, sum(len(strokes) for _color, strokes in layers))
+        base = 0
+        # Layers go out one after another, so the page switches colour once each.
+        for color, strokes in layers:
+            for done, _n, batch in iter_stroke_batches(strokes, self.tolerance, stats, self.timings, color):
+                if self.isInterruptionRequested():
+                    return
+                local.append(batch)
+                self.queue.put(batch.translated(self.zone.left, self.zone.top))
+                self.timed.emit(dict(self.timings))
+                self.batch_ready.emit()
+                self.progress.emit(int(100 * (base + done) / total), "Planning strokes")
+            base += len(strokes)
+        local = StrokePlan.concat(local)
+        self.counted.emit(before, local.n_points)
+        self.done.emit(stats)
+        if self.cache is not None:
+            self.cache.put(cache_key, local, stats, {"points_before": before})
+
+    def _replay_cached(self, plan, stats, meta):
+        self.from_cache = True
+        after = plan.n_points
+        if self.plan:
+            placed = plan.translated(self.zone.left, self.zone.top)
+            for i in range(0, len(placed), STREAM_BATCH):
+                if self.isInterruptionRequested():
+                    return
+                end = min(len(placed), i + STREAM_BATCH)
+                self.queue.put(placed.slice(i, end))
+                self.batch_ready.emit()
+                self.progress.emit(int(100 * end / len(placed)), "Cached plan")
+        self.counted.emit(int(meta.get("points_before", after)), after)
+        if self.plan:
+            self.done.emit(stats)
+
+
+# Injected after every load: input lock, zone picker, colour switch, health
+# and idle probes, and the stroke player driven by StrokePlayer.
+PAGE_HELPERS_JS = """
+(() => {
+  // Events for Python go through the QWebChannel object that BRIDGE_BOOT_JS
+  // sets up; until it has connected they are dropped.
+  const emit = (name, ...args) => {
+    const bridge = window.__wbf_bridge;
+    if (bridge) bridge[name](...args);
+  };
+  window.__wbf_lockInput = () => {
+    if (document.getElementById('__wbf_input_lock')) return true;
+    const lock = document.createElement('div');
+    lock.id = '__wbf_input_lock';
+    lock.style.position = 'fixed';
+    lock.style.inset = '0';
+    lock.style.zIndex = '2147483647';
+    lock.style.background = 'transparent';
+    lock.style.cursor = 'not-allowed';
+    lock.style.pointerEvents = 'auto';
+    lock.addEventListener('mousedown', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('mouseup', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('mousemove', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('pointerdown', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('pointermove', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('pointerup', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    lock.addEventListener('click', e => { e.preventDefault(); e.stopPropagation(); }, true);
+    document.body.appendChild(lock);
+    emit('inputLock', true);
+    return true;
+  };
+  window.__wbf_unlockInput = () => {
+    const lock = document.getElementById('__wbf_input_lock');
+    if (lock) {
+      lock.remove();
+      emit('inputLock', false);
+    }
+    return true;
+  };
+  window.__wbf_zone_select = () => {
+    // Next two clicks on the page are the zone corners; each is pushed as
+    // it happens, and kept in __wbf_zone_clicks for polling without a bridge.
+    if (window.__wbf_zone_handler) {
+      document.removeEventListener('click', window.__wbf_zone_handler, true);
+    }
+    const clicks = window.__wbf_zone_clicks = [];
+    window.__wbf_zone_handler = (e) => {
+      e.preventDefault();
+      e.stopPropagation();
+      const x = Math.round(e.clientX), y = Math.round(e.clientY);
+      clicks.push([x, y]);
+      emit('zoneClick', clicks.length - 1, x, y);
+      if (clicks.length >= 2) document.removeEventListener('click', window.__wbf_zone_handler, true);
+    };
+    document.addEventListener('click', window.__wbf_zone_handler, true);
+    return true;
+  };
+  window.__wbf_set_color = (hex) => {
+    // Board colour for the following strokes. A colour input wins if the
+    // page has one; otherwise click the closest visible palette swatch.
+    // Returns the colour actually picked, or false.
+    const input = document.querySelector('input[type=color]');
+    if (input) {
+      input.value = hex;
+      input.dispatchEvent(new Event('input', { bubbles: true }));
+      input.dispatchEvent(new Event('change', { bubbles: true }));
+      return hex;
+    }
+    const want = [1, 3, 5].map(i => parseInt(hex.slice(i, i + 2), 16));
+    const rgb = el => (getComputedStyle(el).backgroundColor.match(/[\d.]+/g) || []).map(Number);
+    let best = null, bestD = Infinity;
+    const swatches = document.querySelectorAll(
+      '[class*=color], [class*=colour], [class*=swatch], [class*=palette] *'
+    );
+    for (const el of swatches) {
+      const c = rgb(el);
+      if (c.length < 3 || (c.length > 3 && c[3] === 0) || el.offsetParent === null) continue;
+      const d = (c[0] - want[0]) ** 2 + (c[1] - want[1]) ** 2 + (c[2] - want[2]) ** 2;
+      if (d < bestD) { bestD = d; best = el; }
+    }
+    if (!best) return false;
+    for (const type of ['pointerdown', 'mousedown', 'pointerup', 'mouseup', 'click']) {
+      const Ctor = type.startsWith('pointer') ? PointerEvent : MouseEvent;
+      best.dispatchEvent(new Ctor(type, { bubbles: true, buttons: type.endsWith('down') ? 1 : 0 }));
+    }
+    return '#' + rgb(best).slice(0, 3).map(v => Math.round(v).toString(16).padStart(2, '0')).join('');
+  };
+  if (!window.__wbf_player) {
+    // Stroke plan: int16 x/y pairs + int32 points-per-stroke, grown as
+    // chunks arrive. One step = one point (pen-down, move or pen-up).
+    // colors holds [stroke index, '#rrggbb'] switches for layered plans.
+    const P = {
+      xy: new Int16Array(0), lens: new Int32Array(0),
+      nPts: 0, nStrokes: 0, ended: false,
+      colors: [], ci: 0, switches: 0, color: '',
+      si: 0, pi: 0, base: 0, penDown: false, needPenDown: false,
+      state: 'idle', stalled: '', rate: 0, credit: 0, lastTs: 0,
+      fired: 0, frameBudgetMs: 8, maxPerFrame: 0, canvas: null, hadCanvas: false, handle: 0,
+      frameMs: 16, jitterMs: 0, stepMs: 0,
+      reportMs: 150, lastReport: 0, lastReported: '',
+    };
+    const decode = (b64, Ctor) => {
+      const bin = atob(b64);
+      const bytes = new Uint8Array(bin.length);
+      for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+      return new Ctor(bytes.buffer);
+    };
+    const grow = (arr, need) => {
+      if (arr.length >= need) return arr;
+      const out = new arr.constructor(Math.max(need, arr.length * 2));
+      out.set(arr);
+      return out;
+    };
+    const findCanvas = () => {
+      if (P.canvas && P.canvas.isConnected) return P.canvas;
+      P.canvas = [...document.querySelectorAll('canvas')].find(el => el.width > 300) || null;
+      if (!!P.canvas !== P.hadCanvas) {
+        P.hadCanvas = !!P.canvas;
+        emit('canvas', P.hadCanvas);
+      }
+      return P.canvas;
+    };
+    const report = (ts) => {
+      // Throttled push to Python; state or stall changes go out at once.
+      const key = P.state + '/' + P.stalled;
+      if (key === P.lastReported && ts - P.lastReport < P.reportMs) return;
+      P.lastReport = ts;
+      P.lastReported = key;
+      emit('reportProgress', window.__wbf_player.progress());
+    };
+    const fire = (c, type, k, down) => {
+      c.dispatchEvent(new MouseEvent(type, {
+        bubbles: true,
+        clientX: P.xy[k],
+        clientY: P.xy[k + 1],
+        buttons: down ? 1 : 0
+      }));
+    };
+    const step = (c) => {
+      if (P.si >= P.nStrokes) return false;
+      if (P.pi === 0 && P.ci < P.colors.length && P.colors[P.ci][0] <= P.si) {
+        P.color = window.__wbf_set_color(P.colors[P.ci][1]) || '';
+        P.ci += 1;
+        P.switches += 1;
+        return true;
+      }
+      const len = P.lens[P.si];
+      if (P.needPenDown && P.pi > 0) {
+        const k = (P.base + P.pi - 1) * 2;
+        fire(c, 'mousemove', k, false);
+        fire(c, 'mousedown', k, true);
+        P.penDown = true;
+        P.needPenDown = false;
+      } else if (P.pi === 0) {
+        const k = P.base * 2;
+        fire(c, 'mousemove', k, false);
+        fire(c, 'mousedown', k, true);
+        P.penDown = true;
+        P.pi = 1;
+      } else if (P.pi < len) {
+        fire(c, 'mousemove', (P.base + P.pi) * 2, true);
+        P.pi += 1;
+      } else {
+        fire(c, 'mouseup', (P.base + len - 1) * 2, false);
+        P.penDown = false;
+        P.base += len;
+        P.si += 1;
+        P.pi = 0;
+      }
+      P.fired += 1;
+      return true;
+    };
+    const penUp = () => {
+      if (!P.penDown) return;
+      const c = findCanvas();
+      const k = (P.base + Math.max(P.pi - 1, 0)) * 2;
+      if (c) fire(c, 'mouseup', k, false);
+      P.penDown = false;
+    };
+    const schedule = () => {
+      // rAF stops while the window is hidden/minimised; keep going on timers.
+      P.handle = document.hidden
+        ? setTimeout(() => frame(performance.now()), 16)
+        : requestAnimationFrame(frame);
+    };
+    const frame = (ts) => {
+      P.handle = 0;
+      if (P.state !== 'playing') return;
+      schedule();
+      const dt = P.lastTs ? Math.min(ts - P.lastTs, 1000) : 16;
+      P.lastTs = ts;
+      P.jitterMs = P.jitterMs * 0.9 + Math.abs(dt - P.frameMs) * 0.1;
+      P.frameMs = P.frameMs * 0.9 + dt * 0.1;
+      const c = findCanvas();
+      if (!c) {
+        P.stalled = 'canvas';
+        report(ts);
+        return;
+      }
+      P.stalled = '';
+      let budget = Infinity;
+      if (P.rate > 0) {
+        P.credit = Math.min(P.credit + dt * P.rate / 1000, Math.max(1, P.rate / 10));
+        budget = Math.floor(P.credit);
+      }
+      if (P.maxPerFrame > 0) budget = Math.min(budget, P.maxPerFrame);
+      const t0 = performance.now();
+      let n = 0;
+      while (n < budget && step(c)) {
+        n += 1;
+        if (P.rate <= 0 && (n & 31) === 0 && performance.now() - t0 > P.frameBudgetMs) break;
+      }
+      if (n > 0) P.stepMs = P.stepMs * 0.8 + ((performance.now() - t0) / n) * 0.2;
+      if (P.rate > 0) P.credit -= n;
+      if (P.si >= P.nStrokes) {
+        if (P.ended) P.state = 'done';
+        else P.stalled = 'data';
+      }
+      report(ts);
+    };
+    window.__wbf_player = {
+      reset() {
+        this.stop();
+        P.xy = new Int16Array(0);
+        P.lens = new Int32Array(0);
+        P.nPts = P.nStrokes = P.si = P.pi = P.base = P.fired = 0;
+        P.colors = [];
+        P.ci = P.switches = 0;
+        P.color = '';
+        P.ended = false;
+        P.needPenDown = false;
+        P.state = 'idle';
+        P.stalled = '';
+        return true;
+      },
+      append(b64xy, b64lens, colors) {
+        for (const [i, color] of colors || []) {
+          const last = P.colors[P.colors.length - 1];
+          if (!last || last[1] !== color) P.colors.push([P.nStrokes + i, color]);
+        }
+        const xy = decode(b64xy, Int16Array);
+        const lens = decode(b64lens, Int32Array);
+        P.xy = grow(P.xy, P.nPts * 2 + xy.length);
+        P.xy.set(xy, P.nPts * 2);
+        P.nPts += xy.length / 2;
+        P.lens = grow(P.lens, P.nStrokes + lens.length);
+        P.lens.set(lens, P.nStrokes);
+        P.nStrokes += lens.length;
+        return P.nStrokes;
+      },
+      finish() { P.ended = true; return P.nStrokes; },
+      seek(si) {
+        // Skip the first si strokes (resuming an interrupted job). The
+        // colour active at that stroke is re-applied on the next step.
+        si = Math.max(0, Math.min(si, P.nStrokes));
+        let base = 0;
+        for (let i = 0; i < si; i++) base += P.lens[i];
+        let ci = 0;
+        while (ci + 1 < P.colors.length && P.colors[ci + 1][0] <= si) ci += 1;
+        P.si = si;
+        P.pi = 0;
+        P.base = base;
+        P.ci = ci;
+        P.needPenDown = false;
+        return true;
+      },
+      start(rate) {
+        P.rate = rate;
+        P.credit = 0;
+        P.lastTs = 0;
+        P.state = 'playing';
+        if (!P.handle) schedule();
+        return true;
+      },
+      tune(rate, maxPerFrame) { P.rate = rate; P.maxPerFrame = maxPerFrame; return true; },
+      reportEvery(ms) { P.reportMs = ms; return true; },
+      pause() {
+        if (P.state !== 'playing') return false;
+        P.state = 'paused';
+        if (P.penDown) {
+          penUp();
+          P.needPenDown = P.pi > 0;
+        }
+        return true;
+      },
+      resume() {
+        if (P.state !== 'paused') return false;
+        return this.start(P.rate);
+      },
+      stop() {
+        penUp();
+        if (P.state === 'playing' || P.state === 'paused') P.state = 'stopped';
+        return true;
+      },
+      progress() {
+        return [P.state, P.si, P.pi, P.nStrokes, P.fired, P.stalled, P.frameMs, P.stepMs,
+                P.jitterMs, P.nPts - P.base - P.pi, P.switches, P.color];
+      },
+    };
+  }
+  if (!window.__wbf_health) {
+    // Page health for the quality governor: rAF frame deltas and long tasks
+    // since the previous read, which resets them.
+    const H = { frames: [], longMs: 0, longN: 0, last: 0 };
+    const tick = (ts) => {
+      if (H.last && H.frames.length < 600) H.frames.push(ts - H.last);
+      H.last = ts;
+      requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+    document.addEventListener('visibilitychange', () => { H.last = 0; });
+    try {
+      new PerformanceObserver((list) => {
+        for (const e of list.getEntries()) {
+          H.longMs += e.duration;
+          H.longN += 1;
+        }
+      }).observe({ type: 'longtask' });
+    } catch (e) {}
+    window.__wbf_health = () => {
+      const f = H.frames.sort((a, b) => a - b);
+      const avg = f.length ? f.reduce((a, b) => a + b, 0) / f.length : 0;
+      const p95 = f.length ? f[Math.min(f.length - 1, Math.floor(f.length * 0.95))] : 0;
+      const out = [avg, p95, H.longMs, H.longN, f.length, document.hidden];
+      H.frames = [];
+      H.longMs = H.longN = 0;
+      return out;
+    };
+  }
+  if (!window.__wbf_idle_ms) {
+    // Time since the last real user input, for the renderer watchdog.
+    let lastInput = performance.now();
+    const seen = (e) => { if (e.isTrusted) lastInput = performance.now(); };
+    for (const type of ['pointerdown', 'pointermove', 'keydown', 'wheel', 'touchstart']) {
+      window.addEventListener(type, seen, { capture: true, passive: true });
+    }
+    window.__wbf_idle_ms = () => performance.now() - lastInput;
+  }
+  return true;
+})();
+"""
+
+
+# Injected at document creation: Qt's qwebchannel.js (scoped to this closure)
+# plus the hookup that exposes PageBridge as window.__wbf_bridge.
+BRIDGE_BOOT_JS = """
+new QWebChannel(qt.webChannelTransport, (channel) => {
+  window.__wbf_bridge = channel.objects.wbf;
+  window.__wbf_bridge.hello();
+});
+"""
+
+
+# The helpers and the bridge live in an isolated world: the board's own
+# scripts (and any other page the view navigates to, like the sign-in
+# pages) can neither see window.__wbf_bridge nor tamper with the helpers,
+# while DOM events they dispatch still reach the page.
+APP_WORLD = QWebEngineScript.ScriptWorldId.ApplicationWorld.value
+
+
+def page_bridge_script():
+    f = QFile(":/qtwebchannel/qwebchannel.js")
+    if not f.open(QIODevice.OpenModeFlag.ReadOnly):
+        print("qwebchannel.js is unavailable; page events fall back to polling", file=sys.stderr)
+        return None
+    source = bytes(f.readAll()).decode("utf-8")
+    f.close()
+    script = QWebEngineScript()
+    script.setName("wbf-bridge")
+    script.setSourceCode(f"(() => {{\n{source}\n{BRIDGE_BOOT_JS}}})();")
+    script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+    script.setWorldId(APP_WORLD)
+    script.setRunsOnSubFrames(False)
+    return script
+
+
+class PageBridge(QObject):
+    # Registered as "wbf" on the page's QWebChannel. The injected helpers
+    # call these slots; they only re-emit as Qt signals, so the page can
+    # report events but not drive anything.
+    ready = pyqtSignal()
+    zone_clicked = pyqtSignal(int, int, int)
+    progress = pyqtSignal(list)
+    canvas_changed = pyqtSignal(bool)
+    input_lock_changed = pyqtSignal(bool)
+
+    @pyqtSlot()
+    def hello(self):
+        self.ready.emit()
+
+    @pyqtSlot(int, int, int)
+    def zoneClick(self, index, x, y):
+        self.zone_clicked.emit(index, x, y)
+
+    @pyqtSlot(list)
+    def reportProgress(self, result):
+        self.progress.emit(result)
+
+    @pyqtSlot(bool)
+    def canvas(self, found):
+        self.canvas_changed.emit(found)
+
+    @pyqtSlot(bool)
+    def inputLock(self, locked):
+        self.input_lock_changed.emit(locked)
+
+
+def _b64(arr) -> str:
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+class StrokePlayer:
+    # Python side of window.__wbf_player (see install_js_helpers). The stroke
+    # plan is uploaded once in packed chunks and the page fires the mouse
+    # events itself from requestAnimationFrame, so there is no IPC per point.
+    native = False
+
+    def __init__(self, page):
+        self.page = page
+        # Python-side cost of encoding and queueing uploads, in ms.
+        self.upload_ms = 0.0
+
+    def _call(self, expr, callback=None):
+        js = f"window.__wbf_player ? window.__wbf_player.{expr} : null;"
+        if callback is None:
+            self.page.runJavaScript(js, APP_WORLD)
+        else:
+            self.page.runJavaScript(js, APP_WORLD, callback)
+
+    def load(self, plan):
+        self.begin()
+        self.append(plan)
+        self.finish()
+
+    def begin(self):
+        self._call("reset()")
+
+    def finish(self):
+        self._call("finish()")
+
+    def seek(self, stroke_i):
+        self._call(f"seek({int(stroke_i)})")
+
+    def append(self, plan):
+        # Split on stroke boundaries into ~PLAYER_CHUNK_POINTS uploads.
+        t = time.perf_counter()
+        start = 0
+        while start < len(plan):
+            end = int(np.searchsorted(plan.offsets, plan.offsets[start] + PLAYER_CHUNK_POINTS))
+            end = min(max(end, start + 1), len(plan))
+            chunk = plan.slice(start, end)
+            xy = np.clip(chunk.xy, -32768, 32767).astype("<i2")
+            colors = json.dumps(chunk.colors)
+            self._call(f"append('{_b64(xy)}', '{_b64(chunk.lengths().astype('<i4'))}', {colors})")
+            start = end
+        self.upload_ms += (time.perf_counter() - t) * 1000.0
+
+    def start(self, points_per_sec):
+        self._call(f"start({float(points_per_sec):.2f})")
+
+    def tune(self, points_per_sec, max_per_frame):
+        self._call(f"tune({float(points_per_sec):.2f}, {int(max_per_frame)})")
+
+    def report_every(self, ms):
+        self._call(f"reportEvery({int(ms)})")
+
+    def pause(self):
+        self._call("pause()")
+
+    def resume(self):
+        self._call("resume()")
+
+    def stop(self):
+        self._call("stop()")
+
+    def poll(self, callback):
+        # callback(result, rtt_ms); result is [state, stroke_i, point_i,
+        # strokes, fired, stalled, frame_ms, step_ms, frame_jitter_ms, backlog,
+        # color_switches, color]
+        sent = time.monotonic()
+        self._call("progress()", lambda result: callback(result, (time.monotonic() - sent) * 1000.0))
+
+
+class NativeStrokePlayer(QObject):
+    # Drop-in for StrokePlayer that plays the plan from Python: each step is a
+    # QMouseEvent sent to the view's focus proxy, so the board sees trusted
+    # input from Chromium's own pipeline (which also coalesces moves) instead
+    # of synthetic MouseEvents. Plan coordinates are CSS px (clientX/Y) and
+    # are scaled by the view's zoom. Progress goes out through the progress
+    # signal in the same list format the page player reports.
+    native = True
+    progress = pyqtSignal(list)
+
+    def __init__(self, view, page, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.page = page
+        self.upload_ms = 0.0
+        self.report_ms = PLAYER_POLL_MS
+        self.target = None
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(NATIVE_TICK_MS)
+        self.timer.timeout.connect(self._tick)
+        self.state = "idle"
+        self.plan = StrokePlan()
+        self.pen_down = False
+        self.begin()
+
+    def load(self, plan):
+        self.begin()
+        self.append(plan)
+        self.finish()
+
+    def begin(self):
+        self.stop()
+        self.plan = StrokePlan()
+        self.ended = False
+        self.si = self.pi = self.ci = 0
+        self.fired = self.switches = 0
+        self.color = ""
+        self.color_pending = False
+        self.pen_down = self.need_pen_down = False
+        self.state = "idle"
+        self.stalled = ""
+        self.rate = 0.0
+        self.max_per_frame = 0
+        self.credit = 0.0
+        self.last_ts = 0.0
+        self.frame_ms = float(NATIVE_TICK_MS)
+        self.jitter_ms = 0.0
+        self.step_ms = 0.0
+        self.last_report = 0.0
+        self.last_reported = ""
+
+    def append(self, plan):
+        t = time.perf_counter()
+        self.plan = StrokePlan.concat([self.plan, plan])
+        self.upload_ms += (time.perf_counter() - t) * 1000.0
+
+    def finish(self):
+        self.ended = True
+
+    def seek(self, stroke_i):
+        self.si = max(0, min(int(stroke_i), len(self.plan)))
+        self.pi = 0
+        self.ci = max(0, sum(1 for i, _c in self.plan.colors if i <= self.si) - 1)
+        self.need_pen_down = False
+
+    def start(self, points_per_sec):
+        self.rate = float(points_per_sec)
+        self.credit = 0.0
+        self.last_ts = 0.0
+        self.state = "playing"
+        self.timer.start()
+
+    def tune(self, points_per_sec, max_per_frame):
+        self.rate = float(points_per_sec)
+        self.max_per_frame = int(max_per_frame)
+
+    def report_every(self, ms):
+        self.report_ms = int(ms)
+
+    def pause(self):
+        if self.state != "playing":
+            return
+        self.state = "paused"
+        self.timer.stop()
+        if self.pen_down:
+            self._pen_up()
+            self.need_pen_down = self.pi > 0
+
+    def resume(self):
+        if self.state == "paused":
+            self.start(self.rate)
+
+    def stop(self):
+        self.timer.stop()
+        self._pen_up()
+        if self.state in ("playing", "paused"):
+            self.state = "stopped"
+        self._set_target(None)
+
+    def poll(self, callback):
+        # The player state is local; the round trip only measures the page.
+        sent = time.monotonic()
+        self.page.runJavaScript(
+            "0", APP_WORLD, lambda _r: callback(self._progress(), (time.monotonic() - sent) * 1000.0)
+        )
+
+    def _progress(self):
+        base = int(self.plan.offsets[self.si]) if self.si < len(self.plan) else self.plan.n_points
+        return [
+            self.state, self.si, self.pi, len(self.plan), self.fired, self.stalled, self.frame_ms,
+            self.step_ms, self.jitter_ms, self.plan.n_points - base - self.pi, self.switches, self.color,
+        ]
+
+    def _report(self, now_ms):
+        key = f"{self.state}/{self.stalled}"
+        if key == self.last_reported and now_ms - self.last_report < self.report_ms:
+            return
+        self.last_report = now_ms
+        self.last_reported = key
+        self.progress.emit(self._progress())
+
+    def _set_target(self, target):
+        # Real mouse input on the board is dropped while a draw is playing.
+        if target is self.target:
+            return
+        try:
+            if self.target is not None:
+                self.target.removeEventFilter(self)
+        except RuntimeError:
+            pass
+        self.target = target
+        if target is not None:
+            target.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if (
+            obj is self.target
+            and self.state == "playing"
+            and event.spontaneous()
+            and event.type() in (
+                QEvent.Type.MouseButtonPress,
+                QEvent.Type.MouseButtonRelease,
+                QEvent.Type.MouseButtonDblClick,
+                QEvent.Type.MouseMove,
+            )
+        ):
+            return True
+        return super().eventFilter(obj, event)
+
+    def _send(self, kind, k, down):
+        x, y = self.plan.xy[k]
+        zoom = self.view.zoomFactor()
+        local = QPointF(float(x) * zoom, float(y) * zoom)
+        glob = QPointF(self.target.mapToGlobal(local))
+        left = Qt.MouseButton.LeftButton
+        none = Qt.MouseButton.NoButton
+        button = none if kind == QEvent.Type.MouseMove else left
+        event = QMouseEvent(kind, local, glob, button, left if down else none, Qt.KeyboardModifier.NoModifier)
+        QApplication.sendEvent(self.target, event)
+
+    def _pen_up(self):
+        if not self.pen_down or self.target is None:
+            self.pen_down = False
+            return
+        k = int(self.plan.offsets[self.si]) + max(self.pi - 1, 0)
+        self._send(QEvent.Type.MouseButtonRelease, k, False)
+        self.pen_down = False
+
+    def _on_color(self, picked):
+        self.color = picked or ""
+        self.color_pending = False
+
+    def _step(self):
+        plan = self.plan
+        if self.si >= len(plan):
+            return False
+        if self.pi == 0 and self.ci < len(plan.colors) and plan.colors[self.ci][0] <= self.si:
+            # Wait for the switch to land before the next stroke's input.
+            color = plan.colors[self.ci][1]
+            self.ci += 1
+            self.switches += 1
+            self.color_pending = True
+            self.page.runJavaScript(
+                f"window.__wbf_set_color ? window.__wbf_set_color({json.dumps(color)}) : false",
+                APP_WORLD,
+                self._on_color,
+            )
+            return False
+        base = int(plan.offsets[self.si])
+        n = int(plan.offsets[self.si + 1]) - base
+        move = QEvent.Type.MouseMove
+        if self.need_pen_down and self.pi > 0:
+            self._send(move, base + self.pi - 1, False)
+            self._send(QEvent.Type.MouseButtonPress, base + self.pi - 1, True)
+            self.pen_down = True
+            self.need_pen_down = False
+        elif self.pi == 0:
+            self._send(move, base, False)
+            self._send(QEvent.Type.MouseButtonPress, base, True)
+            self.pen_down = True
+            self.pi = 1
+        elif self.pi < n:
+            self._send(move, base + self.pi, True)
+            self.pi += 1
+        else:
+            self._send(QEvent.Type.MouseButtonRelease, base + n - 1, False)
+            self.pen_down = False
+            self.si += 1
+            self.pi = 0
+        self.fired += 1
+        return True
+
+    def _tick(self):
+        now = time.perf_counter() * 1000.0
+        dt = min(now - self.last_ts, 1000.0) if self.last_ts else float(NATIVE_TICK_MS)
+        self.last_ts = now
+        self.jitter_ms = self.jitter_ms * 0.9 + abs(dt - self.frame_ms) * 0.1
+        self.frame_ms = self.frame_ms * 0.9 + dt * 0.1
+        self._set_target(self.view.focusProxy())
+        if self.target is None:
+            self.stalled = "view"
+            self._report(now)
+            return
+        if self.color_pending:
+            self.stalled = "color"
+            self._report(now)
+            return
+        self.stalled = ""
+        budget = math.inf
+        if self.rate > 0:
+            self.credit = min(self.credit + dt * self.rate / 1000.0, max(1.0, self.rate / 10.0))
+            budget = math.floor(self.credit)
+        if self.max_per_frame > 0:
+            budget = min(budget, self.max_per_frame)
+        t0 = time.perf_counter()
+        n = 0
+        while n < budget and not self.color_pending and self._step():
+            n += 1
+            if self.rate <= 0 and n % 16 == 0 and (time.perf_counter() - t0) * 1000.0 > NATIVE_TICK_BUDGET_MS:
+                break
+        if n:
+            self.step_ms = self.step_ms * 0.8 + (time.perf_counter() - t0) * 1000.0 / n * 0.2
+        if self.rate > 0:
+            self.credit -= n
+        if self.si >= len(self.plan):
+            if self.ended:
+                self.state = "done"
+                self.timer.stop()
+                self._set_target(None)
+            else:
+                self.stalled = "data"
+        self._report(now)
+
+
+class PenGroup:
+    # Several players drawing one plan in parallel, behind the single-player
+    # interface. Every appended batch is dealt out with split_plan, so each
+    # pen gets a spatial band of about the same number of points. poll()
+    # merges the pens' progress: stroke_i counts finished strokes, and cursor
+    # is the first stroke of the full plan some pen has yet to finish (what
+    # the checkpoint may safely resume from).
+
+    def __init__(self, players):
+        self.players = players
+        self.native = all(p.native for p in players)
+        self.upload_ms = 0.0
+        self.begin()
+
+    def load(self, plan):
+        self.begin()
+        self.append(plan)
+        self.finish()
+
+    def begin(self):
+        for p in self.players:
+            p.upload_ms = 0.0
+            p.begin()
+        self.plan = StrokePlan()
+        self.ids = [np.zeros(0, dtype=np.int64) for _p in self.players]
+        self.skipped = 0
+        self.cursor = 0
+        self.lanes = [(0, 0)] * len(self.players)
+        self.last = [None] * len(self.players)
+
+    def append(self, plan):
+        self.plan = StrokePlan.concat([self.plan, plan])
+        self._deal(plan, len(self.plan) - len(plan))
+
+    def _deal(self, plan, base):
+        for i, (band, ids) in enumerate(split_plan(plan, len(self.players))):
+            if len(band):
+                self.players[i].append(band)
+                self.ids[i] = np.concatenate([self.ids[i], ids + base])
+        self.upload_ms = sum(p.upload_ms for p in self.players)
+
+    def finish(self):
+        for p in self.players:
+            p.finish()
+
+    def seek(self, stroke_i):
+        # Re-deal everything from stroke_i; earlier strokes count as drawn.
+        stroke_i = max(0, min(int(stroke_i), len(self.plan)))
+        plan = self.plan
+        self.begin()
+        self.plan = plan
+        self.skipped = self.cursor = stroke_i
+        self._deal(plan.slice(stroke_i, len(plan)), stroke_i)
+
+    def start(self, points_per_sec):
+        for p in self.players:
+            p.start(points_per_sec)
+
+    def tune(self, points_per_sec, max_per_frame):
+        for p in self.players:
+            p.tune(points_per_sec, max_per_frame)
+
+    def report_every(self, ms):
+        for p in self.players:
+            p.report_every(ms)
+
+    def pause(self):
+        for p in self.players:
+            p.pause()
+
+    def resume(self):
+        for p in self.players:
+            p.resume()
+
+    def stop(self):
+        for p in self.players:
+            p.stop()
+
+    def poll(self, callback):
+        got = {}
+        sent = []
+
+        def deliver():
+            if sent:
+                return
+            sent.append(True)
+            results = [self._silent(i) if i not in got else got[i][0] for i in range(len(self.players))]
+            rtt = max((rtt for _r, rtt in got.values()), default=0.0)
+            callback(self._merge(results), rtt if len(got) == len(self.players) else PEN_POLL_TIMEOUT_MS)
+
+        def on_result(i, result, rtt_ms):
+            if isinstance(result, list) and len(result) >= 12:
+                self.last[i] = result
+            got[i] = (result, rtt_ms)
+            if len(got) == len(self.players):
+                deliver()
+
+        QTimer.singleShot(PEN_POLL_TIMEOUT_MS, deliver)
+        for i, p in enumerate(self.players):
+            p.poll(lambda result, rtt_ms, i=i: on_result(i, result, rtt_ms))
+
+    def _silent(self, i):
+        # A pen that did not answer: its last report, flagged as stalled, or
+        # a not-started lane if it never reported.
+        last = self.last[i] or ["idle", 0, 0, 0, 0, "", 0.0, 0.0, 0.0, 0, 0, ""]
+        return [*last[:5], "pen", *last[6:]]
+
+    def _merge(self, results):
+        if not all(isinstance(r, list) and len(r) >= 12 for r in results):
+            return None
+        states = [r[0] for r in results]
+        if all(st == "done" for st in states):
+            state = "done"
+        elif "playing" in states:
+            state = "playing"
+        else:
+            state = next(st for st in states if st != "done")
+        nexts = []
+        self.lanes = []
+        for r, ids in zip(results, self.ids):
+            si = int(r[1])
+            self.lanes.append((si, len(ids)))
+            if si < len(ids):
+                nexts.append(int(ids[si]))
+        self.cursor = min(nexts) if nexts else len(self.plan)
+        main = results[0]
+        return [
+            state,
+            self.skipped + sum(si for si, _n in self.lanes),
+            main[2],
+            len(self.plan),
+            sum(int(r[4]) for r in results),
+            next((r[5] for r in results if r[5]), ""),
+            max(float(r[6]) for r in results),
+            max(float(r[7]) for r in results),
+            max(float(r[8]) for r in results),
+            sum(int(r[9]) for r in results),
+            sum(int(r[10]) for r in results),
+            main[11],
+        ]
+
+
+class ExtraPen(QObject):
+    # One more page on the shared profile, joined to the same board and drawn
+    # through its own players. Rendered off screen at the main view's size
+    # and zoom so plan coordinates land where they would in the main view.
+    lost = pyqtSignal(object)
+    loaded = pyqtSignal(object)
+
+    def __init__(self, app, url):
+        super().__init__(app)
+        self.ready = False
+        self.view = QWebEngineView()
+        self.view.setAttribute(Qt.WidgetAttribute.WA_DontShowOnScreen, True)
+        self.page = LockedPage(app.profile, app)
+        self.view.setPage(self.page)
+        self.js_player = StrokePlayer(self.page)
+        self.native_player = NativeStrokePlayer(self.view, self.page, self)
+        self.page.loadStarted.connect(self._on_load_started)
+        self.page.loadFinished.connect(self._on_load_finished)
+        self.page.renderProcessTerminated.connect(self._on_render_terminated)
+        self.match(app.view)
+        self.view.show()
+        self.view.setUrl(QUrl(url))
+
+    def match(self, view):
+        self.view.resize(view.size())
+        self.view.setZoomFactor(view.zoomFactor())
+
+    def player(self, backend):
+        return self.native_player if backend == "native" else self.js_player
+
+    def _on_load_started(self):
+        if self.ready:
+            self.ready = False
+            self.lost.emit(self)
+
+    def _on_load_finished(self, ok):
+        self.ready = ok
+        if ok:
+            self.page.runJavaScript(PAGE_HELPERS_JS, APP_WORLD)
+            self.loaded.emit(self)
+
+    def _on_render_terminated(self, status, _exit_code):
+        if status == QWebEnginePage.RenderProcessTerminationStatus.NormalTerminationStatus:
+            return
+        self.ready = False
+        self.lost.emit(self)
+        self.view.reload()
+
+    def close(self):
+        self.native_player.stop()
+        self.js_player.stop()
+        self.view.setPage(None)
+        self.page.deleteLater()
+        self.view.deleteLater()
+        self.deleteLater()
+
+
+class AdaptiveRateController:
+    # AIMD on measured page latency: back off multiplicatively when the
+    # runJavaScript round trip or the page's frame time runs over target,
+    # otherwise ramp up gently. Points per frame follow the measured cost of
+    # one step so a frame never spends much more than ADAPTIVE_FRAME_WORK_MS
+    # firing events.
+    def __init__(self, start_rate=110.0):
+        self.rate = start_rate
+        self.max_per_frame = 0
+        self.rtt_ms = 0.0
+        self.frame_ms = 0.0
+        self.step_ms = 0.0
+
+    def update(self, rtt_ms, frame_ms, step_ms):
+        a = 0.3
+        self.rtt_ms = rtt_ms if not self.rtt_ms else self.rtt_ms * (1 - a) + rtt_ms * a
+        self.frame_ms = frame_ms
+        self.step_ms = step_ms
+        if self.rtt_ms > ADAPTIVE_TARGET_RTT_MS or frame_ms > ADAPTIVE_TARGET_FRAME_MS:
+            self.rate *= 0.75
+        elif self.rtt_ms < ADAPTIVE_TARGET_RTT_MS * 0.6 and frame_ms < ADAPTIVE_TARGET_FRAME_MS * 0.8:
+            self.rate = self.rate * 1.1 + 5.0
+        self.rate = min(ADAPTIVE_MAX_RATE, max(ADAPTIVE_MIN_RATE, self.rate))
+        if step_ms > 0:
+            self.max_per_frame = int(min(4000, max(4, ADAPTIVE_FRAME_WORK_MS / step_ms)))
+        return self.rate, self.max_per_frame
+
+    def poll_interval_ms(self):
+        # Polling is itself page work; back it off when the page is slow.
+        return int(min(500, max(PLAYER_POLL_MS, 4 * self.rtt_ms)))
+
+
+class QualityGovernor:
+    # Picks a GOVERNOR_LEVELS index from page health (rAF frame p95, share of
+    # the interval spent in long tasks) and renderer CPU share and RSS, with
+    # hysteresis: any hot signal counts towards a step up, and only samples
+    # where every signal is calm count towards a step down.
+    def __init__(self):
+        self.level = 0
+        self.hot = 0
+        self.calm = 0
+        self.cpu_mark = None
+        self.sample = {}
+
+    @property
+    def name(self):
+        return GOVERNOR_LEVELS[self.level][0]
+
+    @property
+    def draw_scale(self):
+        return GOVERNOR_LEVELS[self.level][3]
+
+    def reset(self):
+        self.level = self.hot = self.calm = 0
+        self.cpu_mark = None
+
+    def renderer(self, pid):
+        # (CPU share of one core since the last call, RSS in MB).
+        now = time.monotonic()
+        cpu_s = proc_cpu_s(pid) if pid else None
+        share = 0.0
+        if cpu_s is not None and self.cpu_mark is not None and self.cpu_mark[0] == pid:
+            _pid, last_t, last_cpu = self.cpu_mark
+            if now > last_t:
+                share = max(0.0, (cpu_s - last_cpu) / (now - last_t))
+        self.cpu_mark = (pid, now, cpu_s) if cpu_s is not None else None
+        return share, proc_status_kb(pid, "VmRSS") / 1024.0 if pid else 0.0
+
+    def update(self, frame_p95_ms, long_task_ms, interval_ms, cpu, rss_mb):
+        # Returns the reason text when the level changes, else None.
+        long_share = long_task_ms / interval_ms if interval_ms > 0 else 0.0
+        self.sample = {
+            "frame_p95_ms": round(frame_p95_ms, 1),
+            "long_task_share": round(long_share, 3),
+            "renderer_cpu": round(cpu, 2),
+            "renderer_rss_mb": round(rss_mb),
+        }
+        hot = (
+            frame_p95_ms > GOVERNOR_HOT_FRAME_MS
+            or long_share > GOVERNOR_HOT_LONG_TASK
+            or cpu > GOVERNOR_HOT_CPU
+            or rss_mb > GOVERNOR_RSS_MB
+        )
+        calm = (
+            frame_p95_ms < GOVERNOR_CALM_FRAME_MS
+            and long_share < GOVERNOR_CALM_LONG_TASK
+            and cpu < GOVERNOR_CALM_CPU
+            and rss_mb < GOVERNOR_RSS_MB * 0.8
+        )
+        self.hot = self.hot + 1 if hot else 0
+        self.calm = self.calm + 1 if calm else 0
+        step = 0
+        if self.hot >= GOVERNOR_HOT_SAMPLES and self.level < len(GOVERNOR_LEVELS) - 1:
+            step = 1
+        elif self.calm >= GOVERNOR_CALM_SAMPLES and self.level > 0:
+            step = -1
+        if not step:
+            return None
+        self.level += step
+        self.hot = self.calm = 0
+        return (
+            f"frame p95 {frame_p95_ms:.0f} ms, long tasks {long_share:.0%}, "
+            f"renderer cpu {cpu:.0%}, rss {rss_mb:.0f} MB"
+        )
+
+
 class AuthPopupWindow(QMainWindow):
     def __init__(self, app, profile):
         super().__init__()
@@ -277,17 +2957,288 @@ class AuthPopupWindow(QMainWindow):
         super().closeEvent(event)
 
 
-class ImagePickerDialog(QDialog):
+class ThumbnailCache:
+    # Preview-size PNGs keyed by path + mtime + size, so an edited file gets
+    # a fresh thumbnail. Same LRU-by-mtime trimming as the plan cache.
+    EVICT_EVERY = 32
+
+    def __init__(self, root=THUMB_CACHE_DIR, budget_bytes=THUMB_CACHE_BUDGET_MB * 1024 * 1024):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path):
+        st = os.stat(path)
+        return hashlib.sha1(f"{path}|{st.st_mtime_ns}|{st.st_size}|{THUMB_SIZE}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.png")
+
+    def get(self, key):
+        path = self._path(key)
+        image = QImage(path)
+        if image.isNull():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def put(self, key, image):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            if not image.save(tmp, "PNG"):
+                return
+            os.replace(tmp, path)
+            with self._lock:
+                self._puts += 1
+                evict = self._puts % self.EVICT_EVERY == 0
+            if evict:
+                trim_lru_dir(self.root, ".png", self.budget_bytes)
+        except OSError:
+            pass
+
+
+def read_thumbnail(path, size=THUMB_SIZE):
+    # Let the decoder scale (JPEG decodes at 1/2, 1/4, 1/8 directly) instead
+    # of loading the full photo and shrinking it.
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    full = reader.size()
+    if full.isValid() and max(full.width(), full.height()) > size:
+        reader.setScaledSize(full.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read()
+
+
+class _ThumbnailJob(QRunnable):
+    def __init__(self, service, path, key):
+        super().__init__()
+        self.service = service
+        self.path = path
+        self.key = key
+
+    def run(self):
+        service = self.service
+        if service.take_stale(self.key):
+            return
+        image = service.cache.get(self.key)
+        if image is None:
+            image = read_thumbnail(self.path)
+            if not image.isNull():
+                service.cache.put(self.key, image)
+        service.loaded.emit(self.path, self.key, image)
+
+
+class ThumbnailService(QObject):
+    # Shared by every ImagePickerDialog: pixmap(path) answers from the
+    # in-memory LRU or queues a decode and emits ready(path) when it lands.
+    ready = pyqtSignal(str)
+    loaded = pyqtSignal(str, str, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(4, os.cpu_count() or 1)))
+        self.generation = 0
+        self._pixmaps = OrderedDict()
+        # key -> prefetch generation, or None once the preview itself wants it.
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.loaded.connect(self._on_loaded)
+
+    def pixmap(self, path):
+        # Ready pixmap (null if the file can't be decoded) or None while loading.
+        try:
+            key = ThumbnailCache.key(path)
+        except OSError:
+            return QPixmap()
+        pix = self._pixmaps.get(key)
+        if pix is not None:
+            self._pixmaps.move_to_end(key)
+            return pix
+        self._request(path, key, None, 1)
+        return None
+
+    def prefetch(self, paths):
+        # Replaces the previous prefetch batch; queued jobs from it are dropped.
+        self.generation += 1
+        for path in paths:
+            try:
+                key = ThumbnailCache.key(path)
+            except OSError:
+                continue
+            if key not in self._pixmaps:
+                self._request(path, key, self.generation, 0)
+
+    def _request(self, path, key, generation, priority):
+        with self._lock:
+            if key in self._pending:
+                # Already queued: keep it wanted by the newest batch (or by
+                # the preview) so take_stale doesn't drop it.
+                old = self._pending[key]
+                if generation is None:
+                    self._pending[key] = None
+                elif old is not None:
+                    self._pending[key] = max(old, generation)
+                return
+            self._pending[key] = generation
+        self.pool.start(_ThumbnailJob(self, path, key), priority)
+
+    def take_stale(self, key):
+        # True (and forgotten) if only an older prefetch batch asked for key,
+        # i.e. the user has already scrolled away from it.
+        with self._lock:
+            generation = self._pending.get(key)
+            if generation is None or generation == self.generation:
+                return False
+            del self._pending[key]
+            return True
+
+    def _on_loaded(self, path, key, image):
+        with self._lock:
+            self._pending.pop(key, None)
+        self._pixmaps[key] = QPixmap.fromImage(image)
+        self._pixmaps.move_to_end(key)
+        while len(self._pixmaps) > THUMB_MEMORY_ITEMS:
+            self._pixmaps.popitem(last=False)
+        self.ready.emit(path)
+
+
+class ImageIndex(QObject):
+    # Image files of one folder, scanned once and then kept current by a
+    # QFileSystemWatcher: a change re-lists names and stats only new files.
+    # Search and sort run on the in-memory entries (sort orders memoised).
     IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+    SORT_KEYS = {
+        "Most Recent": (lambda f: f["mtime"], True),
+        "Biggest": (lambda f: f["size"], True),
+        "Smallest": (lambda f: f["size"], False),
+        "Name": (lambda f: f["lower"], False),
+    }
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder = None
+        self.entries = {}
+        self._sorted = {}
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(lambda _path: self.rescan_timer.start())
+        # Downloads land as a burst of create/rename events; rescan once.
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(250)
+        self.rescan_timer.timeout.connect(self.rescan)
+
+    def set_folder(self, folder):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.folder = folder
+        self.entries = {}
+        self.rescan()
+        self.watcher.addPath(folder)
+
+    def rescan(self):
+        try:
+            with os.scandir(self.folder) as it:
+                names = {e.name: e for e in it if e.name.lower().endswith(self.IMAGE_EXTS)}
+        except OSError:
+            names = {}
+        entries = {n: f for n, f in self.entries.items() if n in names}
+        for name, entry in names.items():
+            if name in entries:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            entries[name] = {
+                "path": entry.path,
+                "name": name,
+                "lower": name.lower(),
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+                "label": None,
+            }
+        self.entries = entries
+        self._sorted = {}
+        self.changed.emit()
+
+    def query(self, text, sort):
+        key, reverse = self.SORT_KEYS.get(sort, self.SORT_KEYS["Name"])
+        files = self._sorted.get(sort)
+        if files is None:
+            files = self._sorted[sort] = sorted(self.entries.values(), key=key, reverse=reverse)
+        text = text.strip().lower()
+        return [f for f in files if text in f["lower"]] if text else files
+
+
+class ImageListModel(QAbstractListModel):
+    # Rows are index entries; labels are formatted on first display, so only
+    # the rows that actually get painted cost anything.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        f = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if f["label"] is None:
+                stamp = datetime.fromtimestamp(f["mtime"]).strftime("%Y-%m-%d %H:%M")
+                size_kb = max(1, f["size"] // 1024)
+                f["label"] = f'{f["name"]}  |  {size_kb} KB  |  {stamp}'
+            return f["label"]
+        if role == Qt.ItemDataRole.UserRole:
+            return f["path"]
+        return None
+
+    def path(self, row):
+        return self.rows[row]["path"]
+
+    def row_of(self, path):
+        for i, f in enumerate(self.rows):
+            if f["path"] == path:
+                return i
+        return -1
+
+
+class ImagePickerDialog(QDialog):
 
-    def __init__(self, start_dir: str, parent=None):
+    def __init__(self, start_dir: str, parent=None, thumbs=None):
         super().__init__(parent)
         self.setWindowTitle("Choose Image")
         self.resize(980, 620)
         self.current_dir = start_dir if os.path.isdir(start_dir) else os.path.expanduser("~")
         self.selected_path = None
+        self.thumbs = thumbs or ThumbnailService(parent=self)
+        self.thumbs.ready.connect(self._on_thumbnail_ready)
+        # Scrolling settles before prefetching what's on screen.
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(120)
+        self.prefetch_timer.timeout.connect(self.prefetch_thumbnails)
+        self.index = ImageIndex(self)
+        self.index.changed.connect(self.refresh_file_list)
         self._build_ui()
-        self.refresh_file_list()
+        self.index.set_folder(self.current_dir)
 
     def _build_ui(self):
         root = QVBoxLayout(self)
@@ -313,8 +3264,12 @@ class ImagePickerDialog(QDialog):
         root.addLayout(filters)
 
         grid = QGridLayout()
-        self.file_list = QListWidget(self)
-        self.file_list.currentItemChanged.connect(self.on_item_changed)
+        self.model = ImageListModel(self)
+        self.file_list = QListView(self)
+        self.file_list.setUniformItemSizes(True)
+        self.file_list.setModel(self.model)
+        self.file_list.selectionModel().currentChanged.connect(self.on_item_changed)
+        self.file_list.verticalScrollBar().valueChanged.connect(lambda _v: self.prefetch_timer.start())
         self.preview = QLabel("Select an image to preview", self)
         self.preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.preview.setMinimumSize(420, 420)
@@ -344,70 +3299,64 @@ class ImagePickerDialog(QDialog):
         self.selected_path = None
         self.open_btn.setEnabled(False)
         self.preview.setText("Select an image to preview")
-        self.refresh_file_list()
-
-    def _iter_images(self):
-        out = []
-        try:
-            for entry in os.scandir(self.current_dir):
-                if not entry.is_file():
-                    continue
-                name_l = entry.name.lower()
-                if not name_l.endswith(self.IMAGE_EXTS):
-                    continue
-                st = entry.stat()
-                out.append(
-                    {
-                        "path": entry.path,
-                        "name": entry.name,
-                        "size": st.st_size,
-                        "mtime": st.st_mtime,
-                    }
-                )
-        except Exception:
-            return []
-        return out
+        self.index.set_folder(folder)
 
     def refresh_file_list(self):
-        query = self.search.text().strip().lower()
-        files = self._iter_images()
-        if query:
-            files = [f for f in files if query in f["name"].lower()]
-
-        mode = self.sort_combo.currentText()
-        if mode == "Most Recent":
-            files.sort(key=lambda f: f["mtime"], reverse=True)
-        elif mode == "Biggest":
-            files.sort(key=lambda f: f["size"], reverse=True)
-        elif mode == "Smallest":
-            files.sort(key=lambda f: f["size"])
-        else:
-            files.sort(key=lambda f: f["name"].lower())
-
-        self.file_list.clear()
-        for f in files:
-            stamp = datetime.fromtimestamp(f["mtime"]).strftime("%Y-%m-%d %H:%M")
-            size_kb = max(1, f["size"] // 1024)
-            text = f'{f["name"]}  |  {size_kb} KB  |  {stamp}'
-            item = QListWidgetItem(text)
-            item.setData(Qt.ItemDataRole.UserRole, f["path"])
-            self.file_list.addItem(item)
+        # Filter/sort the in-memory index; keep the selection if it survived.
+        keep = self.selected_path
+        self.model.set_rows(self.index.query(self.search.text(), self.sort_combo.currentText()))
+        row = self.model.row_of(keep) if keep else -1
+        if row >= 0:
+            self.file_list.setCurrentIndex(self.model.index(row))
+        elif keep:
+            self.on_item_changed(QModelIndex(), QModelIndex())
+        self.prefetch_timer.start()
 
     def on_item_changed(self, current, _previous):
-        if current is None:
+        if not current.isValid():
             self.selected_path = None
             self.open_btn.setEnabled(False)
             self.preview.setText("Select an image to preview")
             return
-        path = current.data(Qt.ItemDataRole.UserRole)
+        path = self.model.path(current.row())
+        if path == self.selected_path:
+            return
         self.selected_path = path
         self.open_btn.setEnabled(True)
         self._update_preview()
+        self.prefetch_timer.start()
+
+    def prefetch_thumbnails(self):
+        # Rows on screen plus THUMB_PREFETCH either side of the current one.
+        lst = self.file_list
+        count = self.model.rowCount()
+        if not count:
+            return
+        viewport = lst.viewport().rect()
+        top = lst.indexAt(viewport.topLeft()).row()
+        bottom = lst.indexAt(viewport.bottomLeft()).row()
+        top = max(top, 0)
+        bottom = count - 1 if bottom < 0 else bottom
+        rows = list(range(top, bottom + 1))
+        current = lst.currentIndex().row()
+        if current >= 0:
+            rows += range(max(0, current - THUMB_PREFETCH), min(count, current + THUMB_PREFETCH + 1))
+        paths = dict.fromkeys(self.model.path(r) for r in rows)
+        self.thumbs.prefetch([p for p in paths if p != self.selected_path])
+
+    def _on_thumbnail_ready(self, path):
+        if path == self.selected_path:
+            self._update_preview()
 
     def _update_preview(self):
         if not self.selected_path:
             return
-        pix = QPixmap(self.selected_path)
+        # Scaling the cached thumbnail is cheap; the decode happens in the
+        # thumbnail pool and calls back through _on_thumbnail_ready.
+        pix = self.thumbs.pixmap(self.selected_path)
+        if pix is None:
+            self.preview.setText("Loading preview...")
+            return
         if pix.isNull():
             self.preview.setText("Preview unavailable")
             return
@@ -437,44 +3386,100 @@ class MainWindow(QMainWindow):
         self.resize(1300, 850)
         self._drag_pos = None
 
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.draw_tick)
+        self.keepalive_timer = QTimer(self)
+        self.keepalive_timer.timeout.connect(self.keepalive_tick)
+        self.governor = QualityGovernor()
+        self._gov_forced = set()
+        self._governing = False
+        self.governor_timer = QTimer(self)
+        self.governor_timer.timeout.connect(self.governor_tick)
+        self.auth_popups = []
+
+        # Start the board loading before the rest of the window is built; its
+        # signals only arrive once the event loop runs, after __init__.
+        self.profile = open_profile(self)
+        self.request_filter = RequestFilter(self)
+        self.profile.setUrlRequestInterceptor(self.request_filter)
+
+        self.view = BoardView(self)
+        self.pens = []
+        # Page -> Python events (zone clicks, progress, canvas, input lock).
+        self.bridge = PageBridge(self)
+        self.bridge_ready = False
+        self.canvas_found = False
+        self.input_locked = False
+        self.rtt_ms = 0.0
+        self.report_ms = PLAYER_POLL_MS
+        self.bridge.ready.connect(self._on_bridge_ready)
+        self.bridge.zone_clicked.connect(self._on_zone_click)
+        self.bridge.progress.connect(self._on_pushed_progress)
+        self.bridge.canvas_changed.connect(self._on_canvas_changed)
+        self.bridge.input_lock_changed.connect(self._on_input_lock_changed)
+        self._create_page(BOARD_ZOOM)
+        self.view.setUrl(QUrl(TARGET_URL))
+        self.view.urlChanged.connect(self._sync_url_bar)
+        # Renderer memory watchdog (see recycle_page).
+        self._recycle = None
+        self._recycle_noted = False
+        self.watchdog_timer = QTimer(self)
+        self.watchdog_timer.timeout.connect(self.watchdog_tick)
+        if RENDERER_RSS_LIMIT_MB > 0:
+            self.watchdog_timer.start(WATCHDOG_INTERVAL_MS)
+
         self.image_path = None
         self.zone = None
         self.selecting_zone = False
         self.zone_clicks = []
         self.zone_poll_timer = QTimer(self)
         self.zone_poll_timer.timeout.connect(self.poll_zone_selection)
-        self.paths = []
+        self.plan = StrokePlan()
         self.path_i = 0
         self.point_i = 0
         self.is_drawing = False
         self.is_paused = False
-        self.resume_needs_pen_down = False
-        self.last_point = None
         self.total_paths = 0
         self.last_whiteboard_url = TARGET_URL
+        self._layer_cache = None
+        self.plan_cache = StrokePlanCache()
+        self.checkpoint = DrawCheckpoint()
+        self.thumbs = ThumbnailService(parent=self)
+        self._resume_prompt_open = False
+        self.plan_from_cache = False
+        self.extractor = None
+        self.readout_worker = None
+        self._workers = set()
+        self.order_stats = None
+        self.first_stroke_ms = None
+        self.rate_controller = AdaptiveRateController()
+        self.rate_sample = None
+        self.effective_pps = 0.0
+        self.draw_started_at = 0.0
+        self.paused_at = 0.0
+        self.paused_total = 0.0
+        self.metrics = DrawMetrics()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.draw_tick)
-        self.keepalive_timer = QTimer(self)
-        self.keepalive_timer.timeout.connect(self.keepalive_tick)
-        self.auth_popups = []
-
-        os.makedirs(PROFILE_DIR, exist_ok=True)
-        self.profile = QWebEngineProfile("whiteboardfox-autodraw", self)
-        self.profile.setPersistentStoragePath(PROFILE_DIR)
-        self.profile.setCachePath(os.path.join(PROFILE_DIR, "cache"))
-        self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
-        self.profile.setHttpCacheMaximumSize(512 * 1024 * 1024)
-        self.profile.setPersistentCookiesPolicy(
-            QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies
-        )
-        self.request_filter = RequestFilter(self)
-        self.profile.setUrlRequestInterceptor(self.request_filter)
+        self._init_ui()
+        self._apply_theme()
+        self.keepalive_timer.start(25000)
+        if os.environ.get(METRICS_LOG_ENV):
+            self.metrics_log_btn.setChecked(True)
+        STARTUP.mark("window_built")
 
-        self.view = BoardView(self)
+    def _create_page(self, zoom):
+        # The board page and everything bound to it: bridge channel, bridge
+        # script, players. Also used to swap in a fresh page (recycle_page).
         self.page = LockedPage(self.profile, self)
-        self.view.setPage(self.page)
+        self.channel = QWebChannel(self.page)
+        self.channel.registerObject("wbf", self.bridge)
+        self.page.setWebChannel(self.channel, APP_WORLD)
+        bridge_script = page_bridge_script()
+        if bridge_script is not None:
+            self.page.scripts().insert(bridge_script)
+        self.page.loadStarted.connect(self._on_load_started)
         self.page.newWindowRequested.connect(self._on_new_window_requested)
+        self.page.renderProcessTerminated.connect(self._on_render_terminated)
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.LocalStorageEnabled, True)
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanOpenWindows, True)
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanAccessClipboard, True)
@@ -483,15 +3488,14 @@ class MainWindow(QMainWindow):
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, True)
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.WebGLEnabled, True)
         self.page.settings().setAttribute(QWebEngineSettings.WebAttribute.PlaybackRequiresUserGesture, False)
-        self.view.setZoomFactor(0.9)
-        self.view.setUrl(QUrl(TARGET_URL))
         self.page.loadFinished.connect(self.install_js_helpers)
         self.page.loadFinished.connect(self._on_load_finished)
-        self.view.urlChanged.connect(self._sync_url_bar)
-
-        self._init_ui()
-        self._apply_theme()
-        self.keepalive_timer.start(25000)
+        self.view.setPage(self.page)
+        self.view.setZoomFactor(zoom)
+        self.js_player = StrokePlayer(self.page)
+        self.native_player = NativeStrokePlayer(self.view, self.page, self)
+        self.native_player.progress.connect(self._on_pushed_progress)
+        self.player = self.js_player
 
     def _release_auth_popup(self, popup):
         if popup in self.auth_popups:
@@ -583,6 +3587,15 @@ class MainWindow(QMainWindow):
         self.lowres_btn.setText("View: Normal")
         self.lowres_btn.toggled.connect(self.toggle_lowres_mode)
 
+        self.gov_btn = QToolButton(controls)
+        self.gov_btn.setCheckable(True)
+        self.gov_btn.setText("Auto: Off")
+        self.gov_btn.setToolTip(
+            "Quality governor: turns on Perf: Fast, Low-Res view and a slower draw rate "
+            "while the board is struggling, and back off once it recovers"
+        )
+        self.gov_btn.toggled.connect(self.toggle_governor)
+
         self.keepalive_btn = QToolButton(controls)
         self.keepalive_btn.setCheckable(True)
         self.keepalive_btn.setChecked(True)
@@ -602,11 +3615,57 @@ class MainWindow(QMainWindow):
         speed_label = QLabel("Speed", controls)
         speed_label.setObjectName("hint")
         self.speed_combo = QComboBox(controls)
-        self.speed_combo.addItems(["Slow", "Normal", "Fast", "Very Fast", "Max"])
+        self.speed_combo.addItems([*SPEED_PRESETS, "Adaptive"])
         self.speed_combo.setCurrentText("Fast")
         self.speed_combo.setMinimumWidth(86)
         self.speed_combo.setMaximumWidth(92)
         self.speed_combo.setToolTip("Drawing speed preset")
+        self.speed_combo.currentTextChanged.connect(self.on_speed_changed)
+
+        mode_label = QLabel("Lines", controls)
+        mode_label.setObjectName("hint")
+        self.mode_combo = QComboBox(controls)
+        self.mode_combo.addItems(list(EXTRACT_MODES))
+        self.mode_combo.setToolTip("Outline: trace both sides of every edge. Centerline: draw each line once.")
+        self.mode_combo.currentTextChanged.connect(lambda _text: self.readout_timer.start())
+        self.fill_btn = QToolButton(controls)
+        self.fill_btn.setCheckable(True)
+        self.fill_btn.setText("Fill: Off")
+        self.fill_btn.setToolTip("Hatch dark regions with long strokes")
+        self.fill_btn.toggled.connect(self.toggle_fill_mode)
+        self.colors_combo = QComboBox(controls)
+        self.colors_combo.addItems(list(COLOR_CHOICES))
+        self.colors_combo.setToolTip("Draw in N board colours, one layer per colour")
+        self.colors_combo.currentTextChanged.connect(lambda _text: self.readout_timer.start())
+        self.backend_combo = QComboBox(controls)
+        self.backend_combo.addItems(list(INPUT_BACKENDS))
+        self.backend_combo.setToolTip(
+            "JS events: the page fires synthetic mouse events. "
+            "Native: real mouse events through the browser's input pipeline (applies from the next draw)."
+        )
+        self.pens_combo = QComboBox(controls)
+        self.pens_combo.addItems(list(PEN_CHOICES))
+        self.pens_combo.setToolTip(
+            "Extra pens join this board in hidden pages and each draws a band of the picture. "
+            "Keep the main view at its default size and position while they draw."
+        )
+        self.pens_combo.currentTextChanged.connect(lambda _text: self.sync_pens())
+
+        simplify_label = QLabel("Simplify", controls)
+        simplify_label.setObjectName("hint")
+        self.simplify_slider = QSlider(Qt.Orientation.Horizontal, controls)
+        self.simplify_slider.setRange(0, SIMPLIFY_MAX_TENTHS)
+        self.simplify_slider.setValue(SIMPLIFY_DEFAULT_TENTHS)
+        self.simplify_slider.setFixedWidth(90)
+        self.simplify_slider.setToolTip("Stroke simplification tolerance (pixels)")
+        self.simplify_slider.valueChanged.connect(self.on_simplify_changed)
+        self.simplify_value = QLabel(controls)
+        self.simplify_value.setObjectName("hint")
+        self.simplify_value.setMinimumWidth(40)
+        self.readout_timer = QTimer(self)
+        self.readout_timer.setSingleShot(True)
+        self.readout_timer.setInterval(200)
+        self.readout_timer.timeout.connect(self.refresh_point_readout)
 
         self.start_btn = QPushButton("Start Auto Draw", controls)
         self.start_btn.clicked.connect(self.start_auto_draw)
@@ -626,24 +3685,70 @@ class MainWindow(QMainWindow):
         top_row.addWidget(self.go_btn)
         top_row.addWidget(self.perf_btn)
         top_row.addWidget(self.lowres_btn)
+        top_row.addWidget(self.gov_btn)
         top_row.addWidget(self.keepalive_btn)
         top_row.addWidget(self.reset_session_btn)
         top_row.addWidget(self.choose_btn)
         top_row.addWidget(self.zone_btn)
         top_row.addWidget(speed_label)
         top_row.addWidget(self.speed_combo)
+        top_row.addWidget(mode_label)
+        top_row.addWidget(self.mode_combo)
+        top_row.addWidget(self.fill_btn)
+        top_row.addWidget(self.colors_combo)
+        top_row.addWidget(self.backend_combo)
+        top_row.addWidget(self.pens_combo)
+        top_row.addWidget(simplify_label)
+        top_row.addWidget(self.simplify_slider)
+        top_row.addWidget(self.simplify_value)
         top_row.addWidget(spacer)
         top_row.addWidget(self.start_btn)
         top_row.addWidget(self.pause_btn)
         top_row.addWidget(self.stop_btn)
 
+        status_row = QHBoxLayout()
         self.status = QLabel("Ready", root)
         self.status.setObjectName("hint")
+        self.points_label = QLabel("Points: -", root)
+        self.points_label.setObjectName("hint")
+        self.points_label.setToolTip("Points before / after simplification")
+        self.extract_progress = QProgressBar(root)
+        self.extract_progress.setRange(0, 100)
+        self.extract_progress.setFixedWidth(160)
+        self.extract_progress.setFormat("%p%")
+        self.extract_progress.hide()
+        self.stats_btn = QToolButton(root)
+        self.stats_btn.setCheckable(True)
+        self.stats_btn.setText("Stats ▸")
+        self.stats_btn.setToolTip("Show draw timings, queue depth and throughput")
+        self.stats_btn.toggled.connect(self.toggle_stats_panel)
+        status_row.addWidget(self.status, 1)
+        status_row.addWidget(self.extract_progress)
+        status_row.addWidget(self.points_label)
+        status_row.addWidget(self.stats_btn)
+        self._update_simplify_label()
+
+        self.stats_panel = QFrame(root)
+        self.stats_panel.setObjectName("stats_panel")
+        stats_layout = QHBoxLayout(self.stats_panel)
+        stats_layout.setContentsMargins(10, 6, 10, 6)
+        self.stats_text = QLabel(self.metrics.panel_text(), self.stats_panel)
+        self.stats_text.setObjectName("stats_text")
+        self.stats_text.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.metrics_log_btn = QToolButton(self.stats_panel)
+        self.metrics_log_btn.setCheckable(True)
+        self.metrics_log_btn.setText("Log: Off")
+        self.metrics_log_btn.setToolTip(f"Stream samples to CSV/JSONL (${METRICS_LOG_ENV} or {METRICS_LOG_DIR})")
+        self.metrics_log_btn.toggled.connect(self.toggle_metrics_log)
+        stats_layout.addWidget(self.stats_text, 1)
+        stats_layout.addWidget(self.metrics_log_btn, 0, Qt.AlignmentFlag.AlignTop)
+        self.stats_panel.hide()
 
         root_layout.addWidget(title_bar)
         root_layout.addWidget(controls)
         root_layout.addWidget(self.view, 1)
-        root_layout.addWidget(self.status)
+        root_layout.addWidget(self.stats_panel)
+        root_layout.addLayout(status_row)
         self.setCentralWidget(root)
 
     def _build_title_bar(self, parent):
@@ -704,7 +3809,7 @@ class MainWindow(QMainWindow):
             QMainWindow {
                 background: #0d0d0f;
             }
-            QFrame#title_bar, QWidget#controls {
+            QFrame#title_bar, QWidget#controls, QFrame#stats_panel {
                 background: #0f0f14;
                 border: 1px solid #20202b;
                 border-radius: 10px;
@@ -763,22 +3868,149 @@ class MainWindow(QMainWindow):
                 margin: -5px 0;
                 border-radius: 7px;
             }
+            QProgressBar {
+                background: #111118;
+                color: #c9c9d6;
+                border: 1px solid #2a2a35;
+                border-radius: 6px;
+                text-align: center;
+                font-size: 11px;
+                max-height: 14px;
+            }
+            QProgressBar::chunk {
+                background: #4b78ff;
+                border-radius: 5px;
+            }
             QLabel#hint {
                 color: #9a9aaa;
                 padding-left: 4px;
                 font-size: 12px;
             }
+            QLabel#stats_text {
+                color: #c9c9d6;
+                font-family: monospace;
+                font-size: 11px;
+            }
             """
         )
 
     def set_status(self, text):
         self.status.setText(text)
 
+    def _on_load_started(self):
+        self.bridge_ready = False
+        self.canvas_found = False
+        self.input_locked = False
+
+    def _on_bridge_ready(self):
+        self.bridge_ready = True
+        if self.is_drawing:
+            self.timer.setInterval(RTT_PROBE_MS)
+
+    def _on_canvas_changed(self, found):
+        self.canvas_found = found
+        if self.is_drawing and not found:
+            self.set_status(f"Board canvas lost; waiting... {self.path_i}/{self.total_paths}")
+
+    def _on_input_lock_changed(self, locked):
+        self.input_locked = locked
+        if self.is_drawing and not locked and self._locks_input():
+            # Something lifted the lock mid-draw; put it back.
+            self.page.runJavaScript("window.__wbf_lockInput && window.__wbf_lockInput();", APP_WORLD)
+
+    def paintEvent(self, event):
+        STARTUP.mark("first_paint")
+        super().paintEvent(event)
+
     def _on_load_finished(self, ok):
+        STARTUP.mark("load_finished")
+        STARTUP.report()
         if not ok:
+            self._recycle = None
             self.set_status("Page failed to load")
-        else:
-            self._sync_url_bar(self.view.url())
+            return
+        self._sync_url_bar(self.view.url())
+        if self._recycle is not None:
+            # Fresh renderer after recycle_page: let it settle, then measure
+            # and pick the draw back up without asking.
+            QTimer.singleShot(WATCHDOG_SETTLE_MS, self._finish_recycle)
+            return
+        # A (re)load wipes the in-page player; keep the checkpoint and offer
+        # to pick up where it stopped once the board is back.
+        if self.is_drawing:
+            self._interrupt_auto_draw("Board reloaded")
+        QTimer.singleShot(0, self.offer_resume)
+
+    def _on_render_terminated(self, status, _exit_code):
+        if status == QWebEnginePage.RenderProcessTerminationStatus.NormalTerminationStatus:
+            return
+        if self.is_drawing:
+            self._interrupt_auto_draw("Board renderer crashed")
+        self.view.reload()
+
+    def watchdog_tick(self):
+        if self._recycle is not None:
+            return
+        rss_mb = proc_status_kb(self.page.renderProcessPid(), "VmRSS") / 1024.0
+        if rss_mb < RENDERER_RSS_LIMIT_MB:
+            self._recycle_noted = False
+            return
+        if self.is_drawing:
+            # Input is locked while drawing, so it is idle enough; but wait
+            # for the whole plan so the checkpoint can resume it.
+            if self.extractor is None and self.checkpoint.active:
+                self.recycle_page(rss_mb)
+            return
+        if self.selecting_zone or self._resume_prompt_open:
+            return
+        self.page.runJavaScript(
+            "window.__wbf_idle_ms ? window.__wbf_idle_ms() : 1e9",
+            APP_WORLD,
+            lambda idle_ms, rss_mb=rss_mb: self._on_idle_probe(idle_ms, rss_mb),
+        )
+
+    def _on_idle_probe(self, idle_ms, rss_mb):
+        if self._recycle is not None or self.is_drawing:
+            return
+        if isinstance(idle_ms, (int, float)) and idle_ms >= WATCHDOG_IDLE_S * 1000:
+            self.recycle_page(rss_mb)
+        elif not self._recycle_noted:
+            self._recycle_noted = True
+            self.set_status(
+                f"Board renderer at {rss_mb:.0f} MB; recycling it after {WATCHDOG_IDLE_S}s without input"
+            )
+
+    def recycle_page(self, rss_mb):
+        # Swap the board page for a fresh one, and with it the renderer. A
+        # running draw is interrupted here and resumed by _finish_recycle.
+        resume = self.is_drawing
+        if resume:
+            self._interrupt_auto_draw("Recycling board renderer")
+        self._recycle = {"rss_mb": rss_mb, "resume": resume}
+        url = self.view.url()
+        old_page, old_native = self.page, self.native_player
+        old_native.stop()
+        self._create_page(self.view.zoomFactor())
+        old_native.deleteLater()
+        old_page.deleteLater()
+        self.view.setUrl(url)
+        self.set_status(f"Recycling board renderer at {rss_mb:.0f} MB...")
+
+    def _finish_recycle(self):
+        recycle, self._recycle = self._recycle, None
+        if recycle is None:
+            return
+        before_mb = recycle["rss_mb"]
+        after_mb = proc_status_kb(self.page.renderProcessPid(), "VmRSS") / 1024.0
+        text = (
+            f"Recycled board renderer: {before_mb:.0f} -> {after_mb:.0f} MB"
+            f" ({before_mb - after_mb:.0f} MB reclaimed)"
+        )
+        saved = self.checkpoint.load() if recycle["resume"] else None
+        if saved is not None and not self.is_drawing:
+            self.resume_auto_draw_from(*saved)
+            text += ", draw resumed"
+        self.set_status(text)
 
     def go_home(self):
         self.view.setUrl(QUrl(TARGET_URL))
@@ -788,7 +4020,9 @@ class MainWindow(QMainWindow):
         url_s = qurl.toString()
         self.url_input.setText(url_s)
         if is_whiteboardfox_host(qurl.host().lower()):
-            self.last_whiteboard_url = url_s
+            if url_s != self.last_whiteboard_url:
+                self.last_whiteboard_url = url_s
+                self.sync_pens()
 
     def open_typed_url(self):
         raw = self.url_input.text().strip()
@@ -800,6 +4034,8 @@ class MainWindow(QMainWindow):
             self.set_status(f"Opened: {resolved}")
 
     def toggle_performance_mode(self, enabled):
+        if not self._governing:
+            self._gov_forced.discard("filter")
         self.request_filter.set_fast_mode(enabled)
         self.perf_btn.setText("Perf: Fast" if enabled else "Perf: Normal")
         mode = "FAST" if enabled else "NORMAL"
@@ -807,15 +4043,97 @@ class MainWindow(QMainWindow):
 
     def toggle_lowres_mode(self, enabled):
         # Lower zoom reduces pixels to composite in very heavy boards.
+        if not self._governing:
+            self._gov_forced.discard("zoom")
         if enabled:
-            self.view.setZoomFactor(0.72)
+            self.view.setZoomFactor(LOWRES_ZOOM)
             self.lowres_btn.setText("View: Low-Res")
             self.set_status("Low-Res view enabled for heavy lobbies")
         else:
-            self.view.setZoomFactor(0.9)
+            self.view.setZoomFactor(BOARD_ZOOM)
             self.lowres_btn.setText("View: Normal")
             self.set_status("Normal view enabled")
 
+    def toggle_governor(self, enabled):
+        self.gov_btn.setText("Auto: On" if enabled else "Auto: Off")
+        old = self.governor.level
+        self.governor.reset()
+        if enabled:
+            self.governor_timer.start(GOVERNOR_INTERVAL_MS)
+            self.set_status("Quality governor on")
+        else:
+            self.governor_timer.stop()
+            self._sync_quality()
+            self._log_quality(old, "governor off")
+
+    def governor_tick(self):
+        if not is_whiteboardfox_host(self.view.url().host().lower()):
+            return
+        self._sync_quality()
+        self.page.runJavaScript("window.__wbf_health ? window.__wbf_health() : null", APP_WORLD, self._on_health)
+
+    def _on_health(self, result):
+        if not self.gov_btn.isChecked() or not isinstance(result, list) or len(result) < 6:
+            return
+        _avg_ms, p95_ms, long_ms, _long_n, _frames, hidden = result[:6]
+        if hidden:
+            # No frames while hidden; nothing to judge.
+            return
+        cpu, rss_mb = self.governor.renderer(self.page.renderProcessPid())
+        old = self.governor.level
+        reason = self.governor.update(float(p95_ms), float(long_ms), GOVERNOR_INTERVAL_MS, cpu, rss_mb)
+        if reason is None:
+            return
+        self._sync_quality()
+        self._log_quality(old, reason)
+
+    def _sync_quality(self):
+        # Bring the toggles and draw rate in line with the governor level.
+        # Only settings the governor switched on are switched back off, and
+        # zoom waits for the draw to end (it would move the zone under it).
+        _name, fast, zoom, _scale = GOVERNOR_LEVELS[self.governor.level]
+        self._governing = True
+        try:
+            if fast and not self.perf_btn.isChecked():
+                self._gov_forced.add("filter")
+                self.perf_btn.setChecked(True)
+            elif not fast and "filter" in self._gov_forced:
+                self._gov_forced.discard("filter")
+                self.perf_btn.setChecked(False)
+            lowres = zoom < BOARD_ZOOM
+            if not self.is_drawing:
+                if lowres and not self.lowres_btn.isChecked():
+                    self._gov_forced.add("zoom")
+                    self.lowres_btn.setChecked(True)
+                elif not lowres and "zoom" in self._gov_forced:
+                    self._gov_forced.discard("zoom")
+                    self.lowres_btn.setChecked(False)
+        finally:
+            self._governing = False
+        if self.is_drawing and self.speed_combo.currentText() != "Adaptive":
+            self.player.tune(*self._governed_rate())
+
+    def _log_quality(self, old, reason):
+        new = self.governor.level
+        if new == old:
+            return
+        names = (GOVERNOR_LEVELS[old][0], GOVERNOR_LEVELS[new][0])
+        self.set_status(f"Governor: {names[0]} -> {names[1]} ({reason})")
+        record = {
+            "t": datetime.now().isoformat(timespec="seconds"),
+            "from": names[0],
+            "to": names[1],
+            "reason": reason,
+            "drawing": self.is_drawing,
+            **self.governor.sample,
+        }
+        try:
+            os.makedirs(os.path.dirname(GOVERNOR_LOG), exist_ok=True)
+            with open(GOVERNOR_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
     def toggle_keepalive_mode(self, enabled):
         self.keepalive_btn.setText("AFK Guard: On" if enabled else "AFK Guard: Off")
         if enabled:
@@ -826,159 +4144,468 @@ class MainWindow(QMainWindow):
             self.keepalive_timer.stop()
             self.set_status("AFK guard disabled")
 
-    def get_speed_interval_ms(self):
-        # Lower interval = faster draw ticks.
+    def toggle_stats_panel(self, shown):
+        self.stats_panel.setVisible(shown)
+        self.stats_btn.setText("Stats ▾" if shown else "Stats ▸")
+        if shown:
+            self.stats_text.setText(self.metrics.panel_text())
+
+    def toggle_metrics_log(self, enabled):
+        if not enabled:
+            path = self.metrics.log_path
+            self.metrics.close_log()
+            self.metrics_log_btn.setText("Log: Off")
+            if path:
+                self.set_status(f"Metrics log closed: {path}")
+            return
+        path = os.environ.get(METRICS_LOG_ENV) or os.path.join(
+            METRICS_LOG_DIR, datetime.now().strftime("draw-%Y%m%d-%H%M%S.jsonl")
+        )
+        try:
+            self.metrics.open_log(path)
+        except OSError as exc:
+            self.metrics_log_btn.setChecked(False)
+            self.set_status(f"Could not open metrics log: {exc}")
+            return
+        self.metrics_log_btn.setText("Log: On")
+        self.set_status(f"Logging draw metrics to {path}")
+
+    def get_speed_points_per_sec(self):
+        # 0 = unthrottled: the page fires as many points as fit in each frame.
         name = self.speed_combo.currentText()
-        return {
-            "Slow": 35,
-            "Normal": 18,
-            "Fast": 9,
-            "Very Fast": 5,
-            "Max": 2,
-        }.get(name, 9)
+        if name == "Adaptive":
+            return self.rate_controller.rate
+        return SPEED_PRESETS.get(name, 110)
+
+    def _governed_rate(self):
+        # (points/sec, max per frame) for the player: the speed preset scaled
+        # by the governor level; "Max" has no rate, so it gets a frame cap.
+        rate = self.get_speed_points_per_sec()
+        scale = self.governor.draw_scale
+        if scale >= 1.0 or self.speed_combo.currentText() == "Adaptive":
+            return rate, 0
+        if rate > 0:
+            return rate * scale, 0
+        return 0, max(1, int(GOVERNOR_FRAME_POINTS * scale))
+
+    def _start_player(self):
+        rate, cap = self._governed_rate()
+        self.player.start(rate)
+        if cap:
+            self.player.tune(rate, cap)
+
+    def on_speed_changed(self, name):
+        if not self.is_drawing:
+            return
+        if name == "Adaptive":
+            self.rate_controller = AdaptiveRateController()
+            self.player.tune(self.rate_controller.rate, 0)
+        else:
+            self.player.tune(*self._governed_rate())
+            self.report_ms = PLAYER_POLL_MS
+            self.player.report_every(PLAYER_POLL_MS)
+            self.timer.setInterval(RTT_PROBE_MS if self._progress_pushed() else PLAYER_POLL_MS)
+
+    def get_simplify_tolerance(self):
+        return self.simplify_slider.value() / 10.0
+
+    def _update_simplify_label(self):
+        self.simplify_value.setText(f"{self.get_simplify_tolerance():.1f}px")
+
+    def on_simplify_changed(self, _value):
+        self._update_simplify_label()
+        self.readout_timer.start()
+
+    def get_extract_mode(self):
+        return EXTRACT_MODES.get(self.mode_combo.currentText(), "outline")
+
+    def get_input_backend(self):
+        return INPUT_BACKENDS.get(self.backend_combo.currentText(), "js")
+
+    def get_pen_count(self):
+        return PEN_CHOICES.get(self.pens_combo.currentText(), 1)
+
+    def sync_pens(self):
+        # Open or close extra pens to match the picker and point them at the
+        # main view's board. Pens never change under a running draw.
+        if self.is_drawing:
+            return
+        want = self.get_pen_count() - 1
+        while len(self.pens) > want:
+            self.pens.pop().close()
+        joining = 0
+        for pen in self.pens:
+            if pen.page.requestedUrl().toString() != self.last_whiteboard_url:
+                pen.view.setUrl(QUrl(self.last_whiteboard_url))
+                joining += 1
+        while len(self.pens) < want:
+            pen = ExtraPen(self, self.last_whiteboard_url)
+            pen.lost.connect(self._on_pen_lost)
+            pen.loaded.connect(lambda _pen: QTimer.singleShot(0, self.offer_resume))
+            self.pens.append(pen)
+            joining += 1
+        if joining:
+            self.set_status(f"{joining} extra pen(s) joining {self.last_whiteboard_url}")
+
+    def _pens_on_board(self):
+        strip = QUrl.UrlFormattingOption.RemoveFragment
+        board = self.view.url().adjusted(strip)
+        return [pen for pen in self.pens if pen.ready and pen.page.url().adjusted(strip) == board]
+
+    def _on_pen_lost(self, pen):
+        # A pen's page reloaded or crashed and took its band with it; stop
+        # the whole draw and offer to resume once the pen is back.
+        if self.is_drawing and isinstance(self.player, PenGroup):
+            self._interrupt_auto_draw(f"Pen {self.pens.index(pen) + 2} reloaded")
+
+    def get_color_count(self):
+        return COLOR_CHOICES.get(self.colors_combo.currentText(), 0)
+
+    def toggle_fill_mode(self, enabled):
+        self.fill_btn.setText("Fill: On" if enabled else "Fill: Off")
+        self.readout_timer.start()
+
+    def _layer_key(self):
+        # Must match PathExtractor.key.
+        return (
+            self.image_path,
+            self.zone.width,
+            self.zone.height,
+            self.get_extract_mode(),
+            self.fill_btn.isChecked(),
+            self.get_color_count(),
+        )
+
+    def _cached_layers(self):
+        # Tracing only depends on image + zone size + line/fill/colour mode;
+        # reuse it so the simplify readout and repeated draws skip the
+        # decode/trace pass.
+        key = self._layer_key()
+        if self._layer_cache is not None and self._layer_cache[0] == key:
+            return self._layer_cache[1]
+        return None
+
+    def _on_layers_traced(self, key, layers):
+        self._layer_cache = (key, layers)
+
+    def _start_worker(self, worker):
+        worker.setParent(self)
+        self._workers.add(worker)
+        worker.traced.connect(self._on_layers_traced)
+        worker.finished.connect(lambda w=worker: self._workers.discard(w))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+        return worker
+
+    def _cancel_worker(self, worker):
+        try:
+            if worker is not None and worker.isRunning():
+                worker.requestInterruption()
+        except RuntimeError:
+            # Already finished and deleted.
+            pass
+
+    def refresh_point_readout(self):
+        if not self.image_path or not self.zone or self.zone.width < 3 or self.zone.height < 3:
+            self.points_label.setText("Points: -")
+            return
+        if self.readout_worker is not self.extractor:
+            self._cancel_worker(self.readout_worker)
+        worker = PathExtractor(
+            self.image_path,
+            self.zone,
+            self.get_simplify_tolerance(),
+            self._cached_layers(),
+            plan=False,
+            cache=self.plan_cache,
+            mode=self.get_extract_mode(),
+            fill=self.fill_btn.isChecked(),
+            colors=self.get_color_count(),
+        )
+        worker.counted.connect(lambda before, after, w=worker: self._on_readout_counted(w, before, after))
+        worker.failed.connect(lambda _msg: self.points_label.setText("Points: -"))
+        self.readout_worker = self._start_worker(worker)
+
+    def _on_readout_counted(self, worker, before, after):
+        if worker is self.readout_worker:
+            self._show_point_counts(before, after)
+
+    def _show_point_counts(self, before, after):
+        self.points_label.setText(f"Points: {before:,} -> {after:,}")
 
     def choose_image(self):
         start_dir = CHROMEBOOK_DOWNLOADS if os.path.isdir(CHROMEBOOK_DOWNLOADS) else os.path.expanduser("~")
-        dlg = ImagePickerDialog(start_dir, self)
-        if dlg.exec() != QDialog.DialogCode.Accepted or not dlg.selected_path:
+        dlg = ImagePickerDialog(start_dir, self, self.thumbs)
+        accepted = dlg.exec() == QDialog.DialogCode.Accepted
+        # It listens to the shared thumbnail service; don't keep it around.
+        dlg.deleteLater()
+        if not accepted or not dlg.selected_path:
             return
         self.image_path = dlg.selected_path
         self.set_status(f"Image: {self.image_path.split('/')[-1]}")
+        self.readout_timer.start()
 
     def begin_zone_select(self):
         self.selecting_zone = True
         self.zone_clicks = []
         self.set_status("Click top-left then bottom-right in the board")
-        self.page.runJavaScript(
-            """
-            (() => {
-              window.__wbf_zone_clicks = [];
-              if (window.__wbf_zone_handler) {
-                document.removeEventListener('click', window.__wbf_zone_handler, true);
-              }
-              window.__wbf_zone_handler = (e) => {
-                window.__wbf_zone_clicks.push([Math.round(e.clientX), Math.round(e.clientY)]);
-                e.preventDefault();
-                e.stopPropagation();
-                if (window.__wbf_zone_clicks.length >= 2) {
-                  document.removeEventListener('click', window.__wbf_zone_handler, true);
-                }
-              };
-              document.addEventListener('click', window.__wbf_zone_handler, true);
-              return true;
-            })();
-            """
-        )
-        self.zone_poll_timer.start(120)
+        self.page.runJavaScript("window.__wbf_zone_select && window.__wbf_zone_select();", APP_WORLD)
+        if not self.bridge_ready:
+            # No bridge (yet): read the clicks back instead.
+            self.zone_poll_timer.start(120)
 
     def poll_zone_selection(self):
-        if not self.selecting_zone:
+        if not self.selecting_zone or self.bridge_ready:
             self.zone_poll_timer.stop()
             return
-        self.page.runJavaScript("window.__wbf_zone_clicks || []", self._on_zone_clicks_polled)
+        self.page.runJavaScript("window.__wbf_zone_clicks || []", APP_WORLD, self._on_zone_clicks_polled)
 
     def _on_zone_clicks_polled(self, clicks):
-        if not self.selecting_zone:
-            return
         if not isinstance(clicks, list):
             return
-        if len(clicks) >= 1:
-            self.set_status("Now click bottom-right")
-        if len(clicks) < 2:
+        for index, click in enumerate(clicks[:2]):
+            try:
+                self._on_zone_click(index, int(click[0]), int(click[1]))
+            except (TypeError, ValueError, IndexError):
+                return
+
+    def _on_zone_click(self, index, x, y):
+        if not self.selecting_zone or index != len(self.zone_clicks):
             return
-        try:
-            x1, y1 = int(clicks[0][0]), int(clicks[0][1])
-            x2, y2 = int(clicks[1][0]), int(clicks[1][1])
-        except Exception:
+        self.zone_clicks.append((x, y))
+        if len(self.zone_clicks) < 2:
+            self.set_status("Now click bottom-right")
             return
+        (x1, y1), (x2, y2) = self.zone_clicks
         self.zone = DrawZone(x1, y1, x2, y2)
         self.selecting_zone = False
         self.zone_poll_timer.stop()
         self.set_status(f"Zone set: ({x1},{y1}) to ({x2},{y2})")
-
-    def build_paths(self):
-        img = cv2.imread(self.image_path)
-        if img is None:
-            raise RuntimeError("Could not load image.")
-        if not self.zone or self.zone.width < 3 or self.zone.height < 3:
-            raise RuntimeError("Invalid draw area.")
-
-        resized = cv2.resize(img, (self.zone.width, self.zone.height))
-        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 100, 200)
-        contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-
-        out = []
-        for c in contours:
-            pts = c.reshape(-1, 2)
-            if len(pts) < 2:
-                continue
-            path = []
-            for x, y in pts:
-                path.append((int(x + self.zone.left), int(y + self.zone.top)))
-            out.append(path)
-        return out
+        self.readout_timer.start()
 
     def start_auto_draw(self):
         if self.is_drawing:
             return
-        if not self.image_path:
+        if not self.image_path or not os.path.isfile(self.image_path):
             QMessageBox.warning(self, "Missing Image", "Choose an image first.")
             return
-        if not self.zone:
+        if not self.zone or self.zone.width < 3 or self.zone.height < 3:
             QMessageBox.warning(self, "Missing Area", "Select draw area first.")
             return
-        try:
-            self.paths = self.build_paths()
-        except Exception as exc:
-            QMessageBox.critical(self, "Auto Draw Error", str(exc))
-            return
 
-        if not self.paths:
-            QMessageBox.warning(self, "No Edges", "Could not detect drawable edges.")
-            return
+        # Strokes stream in from the extractor while the player is already
+        # running; the page just idles until the first batch lands.
+        self.checkpoint.clear()
+        self._begin_draw()
+        self._start_player()
+
+        self._cancel_worker(self.readout_worker)
+        worker = PathExtractor(
+            self.image_path,
+            self.zone,
+            self.get_simplify_tolerance(),
+            self._cached_layers(),
+            cache=self.plan_cache,
+            mode=self.get_extract_mode(),
+            fill=self.fill_btn.isChecked(),
+            colors=self.get_color_count(),
+        )
+        worker.batch_ready.connect(lambda w=worker: self._drain_extractor(w))
+        worker.progress.connect(lambda pct, stage, w=worker: self._on_extract_progress(w, pct, stage))
+        worker.counted.connect(lambda before, after, w=worker: self._on_readout_counted(w, before, after))
+        worker.timed.connect(lambda timings, w=worker: self._on_extract_timed(w, timings))
+        worker.done.connect(lambda stats, w=worker: self._on_extract_done(w, stats))
+        worker.failed.connect(lambda msg, w=worker: self._on_extract_failed(w, msg))
+        self.extractor = self.readout_worker = self._start_worker(worker)
+        self.extract_progress.setValue(0)
+        self.extract_progress.show()
+        self.timer.start(RTT_PROBE_MS if self._progress_pushed() else PLAYER_POLL_MS)
+        self.view.setFocus()
+        self.set_status("Auto drawing... preparing strokes")
 
+    def _begin_draw(self):
+        # Fresh draw state and an empty in-page player (not started yet).
+        self.plan = StrokePlan()
         self.path_i = 0
         self.point_i = 0
-        self.total_paths = len(self.paths)
+        self.total_paths = 0
+        self.order_stats = None
+        self.plan_from_cache = False
+        self.first_stroke_ms = None
         self.is_drawing = True
         self.is_paused = False
-        self.resume_needs_pen_down = False
         self.pause_btn.setText("Pause")
-        self.page.runJavaScript("window.__wbf_lockInput && window.__wbf_lockInput();")
-        interval_ms = self.get_speed_interval_ms()
-        self.timer.start(interval_ms)
+        self.rate_controller = AdaptiveRateController()
+        self.rate_sample = None
+        self.effective_pps = 0.0
+        self.metrics.reset()
+        backend = self.get_input_backend()
+        self.player = self.native_player if backend == "native" else self.js_player
+        pens = self._pens_on_board()
+        if pens:
+            for pen in pens:
+                pen.match(self.view)
+            self.player = PenGroup([self.player] + [pen.player(backend) for pen in pens])
+        self.player.upload_ms = 0.0
+        if self._locks_input():
+            self.page.runJavaScript("window.__wbf_lockInput && window.__wbf_lockInput();", APP_WORLD)
+        self.player.begin()
+        self.report_ms = PLAYER_POLL_MS
+        self.player.report_every(self.report_ms)
+        self.draw_started_at = time.monotonic()
+        self.paused_total = 0.0
+
+    def offer_resume(self):
+        # Only on the board the job was drawing on, and never twice at once
+        # (the question box spins the event loop while loads keep coming).
+        if self.is_drawing or self._resume_prompt_open:
+            return
+        saved = self.checkpoint.load()
+        if saved is None:
+            return
+        plan, stats, job, stroke_i = saved
+        strip = QUrl.UrlFormattingOption.RemoveFragment
+        if QUrl(job.get("url", "")).adjusted(strip) != self.view.url().adjusted(strip):
+            return
+        self._resume_prompt_open = True
+        try:
+            reply = QMessageBox.question(
+                self,
+                "Resume Auto Draw",
+                f"An auto draw on this board stopped at stroke {stroke_i + 1:,} of {len(plan):,}.\n"
+                "Resume from there?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes,
+            )
+        finally:
+            self._resume_prompt_open = False
+        if reply != QMessageBox.StandardButton.Yes:
+            self.checkpoint.clear()
+            return
+        if not self.is_drawing:
+            self.resume_auto_draw_from(plan, stats, job, stroke_i)
+
+    def resume_auto_draw_from(self, plan, stats, job, stroke_i):
+        # The saved plan is replayed as-is; no decode or extraction.
+        self.image_path = job.get("image", self.image_path)
+        self.zone = DrawZone(*job["zone"])
+        self._begin_draw()
+        self.plan = plan
+        self.total_paths = len(plan)
+        self.order_stats = stats
+        self.checkpoint.active = True
+        self.player.append(plan)
+        self.player.seek(stroke_i)
+        self.player.finish()
+        self._start_player()
+        self.timer.start(RTT_PROBE_MS if self._progress_pushed() else PLAYER_POLL_MS)
         self.view.setFocus()
-        self.set_status(f"Auto drawing... 0/{self.total_paths}")
+        self.set_status(f"Resuming auto draw from stroke {stroke_i + 1:,}/{len(plan):,}")
+
+    def _checkpoint_job(self, stats):
+        zone = self.zone
+        job = {
+            "image": self.image_path,
+            "zone": [zone.x1, zone.y1, zone.x2, zone.y2],
+            "url": self.view.url().toString(),
+        }
+        self.checkpoint.save_plan(self.plan, stats, job)
+
+    def _drain_extractor(self, worker):
+        if worker is not self.extractor or not self.is_drawing:
+            return
+        while True:
+            try:
+                batch = worker.queue.get_nowait()
+            except queue.Empty:
+                break
+            if not len(batch):
+                continue
+            self.player.append(batch)
+            self.plan = StrokePlan.concat([self.plan, batch])
+            self.total_paths = len(self.plan)
+            if self.first_stroke_ms is None:
+                self.first_stroke_ms = (time.monotonic() - self.draw_started_at) * 1000
+        self.metrics.stages["upload"] = self.player.upload_ms
+
+    def _on_extract_timed(self, worker, timings):
+        if worker is self.extractor:
+            self.metrics.update_stages(timings)
+
+    def _on_extract_progress(self, worker, pct, stage):
+        if worker is not self.extractor:
+            return
+        self.extract_progress.setValue(pct)
+        self.extract_progress.setFormat(f"{stage} %p%")
+
+    def _on_extract_done(self, worker, stats):
+        if worker is not self.extractor:
+            return
+        self._drain_extractor(worker)
+        self.extractor = None
+        self.extract_progress.hide()
+        if not self.is_drawing:
+            return
+        if not len(self.plan):
+            self.stop_auto_draw()
+            QMessageBox.warning(self, "No Edges", "Could not detect drawable edges.")
+            return
+        self.order_stats = stats
+        self.plan_from_cache = worker.from_cache
+        self.player.finish()
+        self._checkpoint_job(stats)
+
+    def _on_extract_failed(self, worker, message):
+        if worker is not self.extractor:
+            return
+        self.extractor = None
+        self.extract_progress.hide()
+        if self.is_drawing:
+            self.stop_auto_draw()
+        QMessageBox.critical(self, "Auto Draw Error", message)
 
     def stop_auto_draw(self):
+        self._halt_draw()
+        self.checkpoint.clear()
+        self.page.runJavaScript("window.__wbf_unlockInput && window.__wbf_unlockInput();", APP_WORLD)
+        self.set_status("Stopped (drawing cancelled)")
+
+    def _interrupt_auto_draw(self, reason):
+        # The page lost the player; keep the checkpoint for offer_resume.
+        self.checkpoint.save_cursor(self._draw_cursor(), force=True)
+        text = f"{reason} at stroke {self.path_i:,}/{self.total_paths:,}"
+        self._halt_draw()
+        self.set_status(text + (" (resume offered on reload)" if self.checkpoint.active else ""))
+
+    def _halt_draw(self):
         self.timer.stop()
-        if self.is_drawing and self.last_point:
-            self.emit_board_event("mouseup", self.last_point[0], self.last_point[1], False)
+        self._cancel_worker(self.extractor)
+        self.extractor = None
+        self.extract_progress.hide()
+        if self.is_drawing:
+            self.player.stop()
         self.is_drawing = False
         self.is_paused = False
-        self.resume_needs_pen_down = False
         self.pause_btn.setText("Pause")
-        self.last_point = None
         self.total_paths = 0
-        self.page.runJavaScript("window.__wbf_unlockInput && window.__wbf_unlockInput();")
-        self.set_status("Stopped (drawing cancelled)")
+        self.sync_pens()
 
     def pause_auto_draw(self):
         if not self.is_drawing or self.is_paused:
             return
-        if self.last_point:
-            self.emit_board_event("mouseup", self.last_point[0], self.last_point[1], False)
-            if self.point_i > 0:
-                self.resume_needs_pen_down = True
+        # The player lifts the pen itself and puts it back down on resume.
+        self.player.pause()
         self.is_paused = True
+        self.paused_at = time.monotonic()
         self.pause_btn.setText("Resume")
         self.set_status("Auto draw paused")
 
     def resume_auto_draw(self):
         if not self.is_drawing or not self.is_paused:
             return
+        self.player.resume()
         self.is_paused = False
+        self.paused_total += time.monotonic() - self.paused_at
         self.pause_btn.setText("Pause")
         self.set_status("Auto draw resumed")
 
@@ -992,97 +4619,156 @@ class MainWindow(QMainWindow):
             self.pause_auto_draw()
 
     def install_js_helpers(self, _ok):
-        self.page.runJavaScript(
-            """
-            (() => {
-              window.__wbf_lockInput = () => {
-                if (document.getElementById('__wbf_input_lock')) return true;
-                const lock = document.createElement('div');
-                lock.id = '__wbf_input_lock';
-                lock.style.position = 'fixed';
-                lock.style.inset = '0';
-                lock.style.zIndex = '2147483647';
-                lock.style.background = 'transparent';
-                lock.style.cursor = 'not-allowed';
-                lock.style.pointerEvents = 'auto';
-                lock.addEventListener('mousedown', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('mouseup', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('mousemove', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('pointerdown', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('pointermove', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('pointerup', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                lock.addEventListener('click', e => { e.preventDefault(); e.stopPropagation(); }, true);
-                document.body.appendChild(lock);
-                return true;
-              };
-              window.__wbf_unlockInput = () => {
-                const lock = document.getElementById('__wbf_input_lock');
-                if (lock) lock.remove();
-                return true;
-              };
-              window.__wbf_fire = (type, x, y, down) => {
-                const c = [...document.querySelectorAll('canvas')].find(el => el.width > 300);
-                if (!c) return false;
-                c.dispatchEvent(new MouseEvent(type, {
-                  bubbles: true,
-                  clientX: x,
-                  clientY: y,
-                  buttons: down ? 1 : 0
-                }));
-                return true;
-              };
-              return true;
-            })();
-            """
-        )
-
-    def emit_board_event(self, ev_type, x, y, down):
-        x = float(x)
-        y = float(y)
-        down_js = "true" if down else "false"
-        self.page.runJavaScript(f"window.__wbf_fire && window.__wbf_fire('{ev_type}', {x:.2f}, {y:.2f}, {down_js});")
+        self.page.runJavaScript(PAGE_HELPERS_JS, APP_WORLD)
 
     def draw_tick(self):
+        # With the bridge up this is only the round-trip probe; progress
+        # arrives through _on_pushed_progress. Without it, poll as before.
         if not self.is_drawing:
             self.timer.stop()
             return
-        if self.is_paused:
+        if not self._progress_pushed():
+            self.metrics.tick(self.timer.interval())
+        self.player.poll(self._on_probe)
+
+    def _on_probe(self, result, rtt_ms):
+        self.rtt_ms = rtt_ms
+        if not self._progress_pushed():
+            self._on_player_progress(result, rtt_ms)
+
+    def _progress_pushed(self):
+        # A PenGroup is polled: its pens have no bridge and progress is merged.
+        if isinstance(self.player, PenGroup):
+            return False
+        return self.player.native or (self.bridge_ready and self.player is self.js_player)
+
+    def _locks_input(self):
+        # The overlay would swallow native events on the main page;
+        # NativeStrokePlayer filters real mouse input itself.
+        main = self.player.players[0] if isinstance(self.player, PenGroup) else self.player
+        return not main.native
+
+    def _draw_cursor(self):
+        return self.player.cursor if isinstance(self.player, PenGroup) else self.path_i
+
+    def _on_pushed_progress(self, result):
+        if not self.is_drawing or not self._progress_pushed():
             return
-        if self.path_i >= len(self.paths):
+        self.metrics.tick(self.report_ms)
+        self._on_player_progress(result, self.rtt_ms)
+
+    def _on_player_progress(self, result, rtt_ms):
+        if not self.is_drawing or not isinstance(result, list) or len(result) < 10:
+            return
+        t0 = time.perf_counter()
+        state, stroke_i, point_i, strokes, fired, stalled, frame_ms, step_ms = result[:8]
+        self.path_i = int(stroke_i)
+        self.point_i = int(point_i)
+        if state != "done":
+            self.checkpoint.save_cursor(self._draw_cursor())
+        self._track_rate(int(fired), float(rtt_ms), float(frame_ms), float(step_ms), state, stalled)
+        self._record_metrics(result, rtt_ms)
+        self.metrics.add_tick_cost((time.perf_counter() - t0) * 1000.0)
+        if state == "done":
             self.timer.stop()
             self.is_drawing = False
-            self.page.runJavaScript("window.__wbf_unlockInput && window.__wbf_unlockInput();")
-            self.set_status(f"Auto draw complete ({self.total_paths}/{self.total_paths})")
+            self.checkpoint.clear()
+            self.page.runJavaScript("window.__wbf_unlockInput && window.__wbf_unlockInput();", APP_WORLD)
+            active = time.monotonic() - self.draw_started_at - self.paused_total
+            steps_per_sec = int(fired) / active if active > 0 else 0.0
+            self.set_status(
+                f"Auto draw complete ({self.total_paths}/{self.total_paths}) in {active:.1f}s"
+                f" | {self._order_summary(steps_per_sec)}"
+            )
             self.total_paths = 0
+            self.sync_pens()
             return
-
-        path = self.paths[self.path_i]
-        if self.resume_needs_pen_down and self.point_i > 0:
-            px, py = path[self.point_i - 1]
-            self.emit_board_event("mousemove", px, py, False)
-            self.emit_board_event("mousedown", px, py, True)
-            self.last_point = (px, py)
-            self.resume_needs_pen_down = False
+        if self.is_paused:
             return
-        if self.point_i == 0:
-            x, y = path[0]
-            self.emit_board_event("mousemove", x, y, False)
-            self.emit_board_event("mousedown", x, y, True)
-            self.last_point = (x, y)
-            self.point_i = 1
+        if stalled == "canvas":
+            self.set_status(f"Waiting for board canvas... {self.path_i}/{self.total_paths}")
             return
-
-        if self.point_i < len(path):
-            x, y = path[self.point_i]
-            self.emit_board_event("mousemove", x, y, True)
-            self.last_point = (x, y)
-            self.point_i += 1
+        text = f"Auto drawing... {self.path_i}/{self.total_paths}"
+        if self.extractor is not None:
+            text += " (still planning)"
+        if self.plan_from_cache:
+            text += " (cached plan)"
+        if self.first_stroke_ms is not None:
+            text += f" | first stroke after {self.first_stroke_ms:.0f} ms"
+        text += f" | {self.effective_pps:.0f} pts/s"
+        if isinstance(self.player, PenGroup):
+            text += " | pens " + " · ".join(f"{si}/{n}" for si, n in self.player.lanes)
+            if stalled == "pen":
+                text += " (a pen is not answering)"
+        if len(result) >= 12 and int(result[10]) > 0:
+            # Empty colour: the last switch found no picker on the board.
+            text += f" | colour {result[11]}" if result[11] else " | no colour picker found"
+        if self.speed_combo.currentText() == "Adaptive":
+            c = self.rate_controller
+            text += f" (adaptive: target {c.rate:.0f}, rtt {c.rtt_ms:.0f} ms, frame {c.frame_ms:.0f} ms)"
+        self.set_status(text)
+
+    def _record_metrics(self, result, rtt_ms):
+        _state, stroke_i, _point_i, strokes, fired, _stalled, frame_ms, step_ms, jitter_ms, backlog = result[:10]
+        # Remaining steps: unplayed points plus one pen-up per unfinished stroke.
+        remaining = int(backlog) + max(0, int(strokes) - int(stroke_i))
+        eta = remaining / self.effective_pps if self.effective_pps > 0 else None
+        worker = self.extractor
+        self.metrics.record(
+            stroke=int(stroke_i),
+            strokes=int(strokes),
+            fired=int(fired),
+            steps_per_sec=round(self.effective_pps, 1),
+            eta_s=None if eta is None else round(eta, 1),
+            rtt_ms=round(float(rtt_ms), 1),
+            frame_ms=round(float(frame_ms), 2),
+            frame_jitter_ms=round(float(jitter_ms), 2),
+            step_ms=round(float(step_ms), 4),
+            worker_queue=worker.queue.qsize() if worker is not None else 0,
+            page_backlog=int(backlog),
+            planning=worker is not None,
+        )
+        if self.stats_panel.isVisible():
+            self.stats_text.setText(self.metrics.panel_text())
+
+    def _track_rate(self, fired, rtt_ms, frame_ms, step_ms, state, stalled):
+        now = time.monotonic()
+        if self.rate_sample is not None:
+            last_t, last_fired = self.rate_sample
+            if now > last_t:
+                pps = (fired - last_fired) / (now - last_t)
+                self.effective_pps = pps if not self.effective_pps else self.effective_pps * 0.7 + pps * 0.3
+        self.rate_sample = (now, fired)
+        # Only steer while the player is actually consuming points.
+        if self.speed_combo.currentText() != "Adaptive" or state != "playing" or stalled or self.is_paused:
             return
-
-        self.emit_board_event("mouseup", path[-1][0], path[-1][1], False)
-        self.path_i += 1
-        self.point_i = 0
-        self.set_status(f"Auto drawing... {self.path_i}/{self.total_paths}")
+        old_rate, old_cap = self.rate_controller.rate, self.rate_controller.max_per_frame
+        rate, cap = self.rate_controller.update(rtt_ms, frame_ms, step_ms)
+        if abs(rate - old_rate) > 0.05 * old_rate or cap != old_cap:
+            self.player.tune(rate, cap)
+        interval = self.rate_controller.poll_interval_ms()
+        if interval != self.report_ms:
+            self.report_ms = interval
+            self.player.report_every(interval)
+        self.timer.setInterval(RTT_PROBE_MS if self._progress_pushed() else interval)
+
+    def _order_summary(self, measured_steps_per_sec=0.0):
+        st = self.order_stats
+        if st is None:
+            return ""
+        text = (
+            f"Reorder: strokes {st.strokes_before}->{st.strokes_after}, "
+            f"pen-up {st.travel_before / 1000:.1f}k->{st.travel_after / 1000:.1f}k px, "
+            f"long jumps {st.long_jumps_before}->{st.long_jumps_after}"
+        )
+        rate = self.get_speed_points_per_sec()
+        if rate > 0:
+            text += f", est. saved {st.steps_saved / rate:.1f}s"
+        else:
+            text += f", est. saved {st.steps_saved} events"
+        if measured_steps_per_sec > 0:
+            text += f", measured saved {st.steps_saved / measured_steps_per_sec:.1f}s"
+        return text
 
     def keepalive_tick(self):
         if not self.keepalive_btn.isChecked():
@@ -1152,16 +4838,518 @@ class MainWindow(QMainWindow):
         self.set_status("Session reset. Sign in again if needed.")
 
     def closeEvent(self, event):
+        for w in list(self._workers):
+            w.requestInterruption()
+            w.wait(2000)
         for p in list(self.auth_popups):
             self._release_auth_popup(p)
+        self.metrics.close_log()
+        if self.is_drawing:
+            self.checkpoint.save_cursor(self._draw_cursor(), force=True)
+        for pen in self.pens:
+            pen.close()
         self.view.setPage(None)
         self.page.deleteLater()
         self.profile.deleteLater()
         super().closeEvent(event)
 
 
+def proc_status_kb(pid, field):
+    # e.g. field="VmHWM" (peak RSS) or "VmRSS"; 0 if unavailable.
+    try:
+        with open(f"/proc/{int(pid)}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def proc_cpu_s(pid):
+    # User + system CPU seconds of a process so far; None if unavailable.
+    try:
+        with open(f"/proc/{int(pid)}/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def write_synthetic_bench_images(folder):
+    # Fallback corpus: line art, text and a smooth "photo" with many edges.
+    rng = np.random.default_rng(7)
+    out = []
+    shapes = np.full((1200, 1600, 3), 255, np.uint8)
+    for _ in range(400):
+        center = (int(rng.integers(0, 1600)), int(rng.integers(0, 1200)))
+        cv2.circle(shapes, center, int(rng.integers(4, 120)), (0, 0, 0), 2)
+    text = np.full((1200, 1600, 3), 255, np.uint8)
+    for row in range(24):
+        cv2.putText(text, "WhiteboardFox autodraw bench " * 2, (10, 45 + row * 48),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    noise = rng.integers(0, 256, (150, 200), dtype=np.uint8)
+    photo = cv2.cvtColor(cv2.resize(noise, (1600, 1200), interpolation=cv2.INTER_CUBIC), cv2.COLOR_GRAY2BGR)
+    for name, img in (("shapes", shapes), ("text", text), ("photo", photo)):
+        path = os.path.join(folder, f"{name}.png")
+        cv2.imwrite(path, img)
+        out.append(path)
+    return out
+
+
+def measure_tiling(image_path, width, height, mode="outline", repeats=3):
+    # Best-of-N trace time, single-threaded vs tiled across EXTRACT_WORKERS,
+    # and whether both give the same number of strokes (seams rejoined).
+    out = {"workers": EXTRACT_WORKERS, "tiles": len(split_tiles(width, height))}
+    for label, workers in (("single", 1), ("tiled", EXTRACT_WORKERS)):
+        best = math.inf
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            strokes = trace_strokes(image_path, width, height, mode, workers=workers)
+            best = min(best, time.perf_counter() - t0)
+        out[f"trace_ms_{label}"] = round(best * 1000.0, 1)
+        out[f"strokes_{label}"] = len(strokes)
+    out["tile_strokes_match"] = out["strokes_single"] == out["strokes_tiled"]
+    out["tile_speedup"] = round(out["trace_ms_single"] / max(out["trace_ms_tiled"], 1e-6), 2)
+    return out
+
+
+class AutodrawBenchmark(QObject):
+    # Offline throughput run: loads bench/board.html (a canvas that records
+    # what it receives), then builds and plays every image at every preset
+    # with every input backend and writes a JSON report.
+    ZONE = DrawZone(20, 20, 1220, 820)
+
+    def __init__(self, images, presets, max_points, tolerance, out_path, timeout_s, mode="outline", fill=False,
+                 colors=0, backends=("js",)):
+        super().__init__()
+        self.out_path = out_path
+        self.timeout_s = timeout_s
+        self.mode = mode
+        self.fill = fill
+        self.colors = colors
+        self.results = []
+        self.jobs = []
+        self.job = None
+        self.started = 0.0
+        self.view = QWebEngineView()
+        self.view.resize(1300, 900)
+        self.page = QWebEnginePage(self.view)
+        self.view.setPage(self.page)
+        self.players = {"js": StrokePlayer(self.page), "native": NativeStrokePlayer(self.view, self.page, self)}
+        self.player = self.players["js"]
+        self.page.loadFinished.connect(self._on_loaded)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(lambda: self.player.poll(self._on_progress))
+
+        for image in images:
+            t0 = time.perf_counter()
+            plan, _layers = build_stroke_plan(
+                image, self.ZONE.width, self.ZONE.height, tolerance, mode=mode, fill=fill, colors=colors
+            )
+            build_ms = (time.perf_counter() - t0) * 1000.0
+            tiling = measure_tiling(image, self.ZONE.width, self.ZONE.height, mode)
+            if plan.n_points > max_points > 0:
+                plan = plan.slice(0, max(1, int(np.searchsorted(plan.offsets, max_points, side="right")) - 1))
+            plan = plan.translated(self.ZONE.left, self.ZONE.top)
+            for preset in presets:
+                for backend in backends:
+                    self.jobs.append(
+                        {
+                            "image": os.path.basename(image),
+                            "preset": preset,
+                            "backend": backend,
+                            "plan": plan,
+                            "build_ms": build_ms,
+                            "tiling": tiling,
+                        }
+                    )
+
+    def start(self):
+        self.view.show()
+        self.view.setUrl(QUrl.fromLocalFile(BENCH_BOARD_HTML))
+
+    def _on_loaded(self, ok):
+        if not ok:
+            print("Could not load bench board.", file=sys.stderr)
+            QApplication.exit(1)
+            return
+        self.page.runJavaScript(PAGE_HELPERS_JS, APP_WORLD)
+        self._next_job()
+
+    def _next_job(self):
+        if not self.jobs:
+            self._finish()
+            return
+        self.job = self.jobs.pop(0)
+        self.page.runJavaScript("window.__bench.reset();")
+        self.player = self.players[self.job["backend"]]
+        self.player.load(self.job["plan"])
+        self.player.start(SPEED_PRESETS[self.job["preset"]])
+        self.started = time.monotonic()
+        self.poll_timer.start(100)
+
+    def _on_progress(self, result, _rtt_ms):
+        if self.job is None or not isinstance(result, list):
+            return
+        timed_out = time.monotonic() - self.started > self.timeout_s
+        if result[0] != "done" and not timed_out:
+            return
+        self.poll_timer.stop()
+        if timed_out:
+            self.player.stop()
+        wall_s = time.monotonic() - self.started
+        self.page.runJavaScript(
+            "window.__bench.stats()", lambda stats: self._record(stats, wall_s, timed_out)
+        )
+
+    def _record(self, stats, wall_s, timed_out):
+        job, self.job = self.job, None
+        stats = stats or {}
+        plan = job["plan"]
+        expected = plan_event_count(plan)
+        received = int(stats.get("mousedown", 0) + stats.get("mousemove", 0) + stats.get("mouseup", 0))
+        self.results.append(
+            {
+                "image": job["image"],
+                "preset": job["preset"],
+                "backend": job["backend"],
+                "strokes": len(plan),
+                "points": plan.n_points,
+                "build_ms": round(job["build_ms"], 1),
+                **job["tiling"],
+                "expected_events": expected,
+                "received_events": received,
+                "dropped_events": max(0, expected - received),
+                "orphan_moves": int(stats.get("orphan_moves", 0)),
+                "trusted_events": int(stats.get("trusted", 0)),
+                "color_layers": len(plan.colors),
+                "color_switches": int(stats.get("color_switches", 0)),
+                "wall_s": round(wall_s, 3),
+                "events_per_sec": round(received / wall_s, 1) if wall_s > 0 else 0.0,
+                "timed_out": timed_out,
+                "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "renderer_peak_rss_kb": proc_status_kb(self.page.renderProcessPid(), "VmHWM"),
+            }
+        )
+        print(
+            f"bench: {job['image']} @ {job['preset']} ({job['backend']}): {self.results[-1]['events_per_sec']} ev/s",
+            file=sys.stderr,
+        )
+        self._next_job()
+
+    def _finish(self):
+        report = {
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "zone": [self.ZONE.width, self.ZONE.height],
+            "mode": self.mode,
+            "fill": self.fill,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "runs": self.results,
+        }
+        text = json.dumps(report, indent=2)
+        if self.out_path:
+            with open(self.out_path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        print(text)
+        QApplication.exit(0)
+
+
+def bench_images(folder):
+    images = []
+    if folder and os.path.isdir(folder):
+        images = sorted(
+            os.path.join(folder, n) for n in os.listdir(folder) if n.lower().endswith(ImageIndex.IMAGE_EXTS)
+        )
+    if not images:
+        images = write_synthetic_bench_images(tempfile.mkdtemp(prefix="wbf-bench-"))
+    return images
+
+
+def run_extract_benchmark(args):
+    # Extraction only (no browser): tiled vs single-threaded trace per image.
+    width, height = args.bench_zone
+    runs = [
+        dict(image=os.path.basename(image), **measure_tiling(image, width, height, args.bench_mode))
+        for image in bench_images(args.bench_images)
+    ]
+    report = {"zone": [width, height], "mode": args.bench_mode, "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.bench_out:
+        with open(args.bench_out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    if not all(run["tile_strokes_match"] for run in runs):
+        print("tiled and single-threaded extraction disagree on stroke count", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_benchmark(args):
+    images = bench_images(args.bench_images)
+    presets = [p for p in (args.bench_presets or list(SPEED_PRESETS)) if p in SPEED_PRESETS]
+    return AutodrawBenchmark(
+        images, presets, args.bench_points, args.bench_tolerance, args.bench_out, args.bench_timeout,
+        args.bench_mode, args.bench_fill, args.bench_colors, args.bench_backends,
+    )
+
+
+class HeadlessDraw(QObject):
+    # --board run: opens the board with the persistent profile on an
+    # off-screen view, streams the plan into the player exactly like the
+    # window does, then prints a JSON summary and exits (0 = drawn).
+    def __init__(self, board_url, image, zone, speed, tolerance, mode="outline", fill=False, colors=0,
+                 backend="js", viewport=HEADLESS_VIEWPORT, timeout_s=3600.0, summary_out=None):
+        super().__init__()
+        self.board_url = board_url
+        self.image = image
+        self.zone = zone
+        self.speed = speed
+        self.tolerance = tolerance
+        self.mode = mode
+        self.fill = fill
+        self.colors = colors
+        self.backend = backend
+        self.timeout_s = timeout_s
+        self.summary_out = summary_out
+        self.plan = StrokePlan()
+        self.extractor = None
+        self.stats = None
+        self.timings = {}
+        self.marks = {}
+        self.started = time.monotonic()
+        self.profile = open_profile(self)
+        self.view = QWebEngineView()
+        self.view.resize(*viewport)
+        self.page = QWebEnginePage(self.profile, self.view)
+        self.view.setPage(self.page)
+        self.view.setZoomFactor(BOARD_ZOOM)
+        if backend == "native":
+            self.player = NativeStrokePlayer(self.view, self.page, self)
+        else:
+            self.player = StrokePlayer(self.page)
+        self.page.loadFinished.connect(self._on_loaded)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(lambda: self.player.poll(self._on_progress))
+        self.last = None
+        self.finished = False
+
+    def _mark(self, name):
+        self.marks.setdefault(name, round((time.monotonic() - self.started) * 1000.0, 1))
+
+    def start(self):
+        # The deadline holds even if the board never loads or the player
+        # never reports.
+        QTimer.singleShot(int(self.timeout_s * 1000), self._on_deadline)
+        self.view.show()
+        self.view.setUrl(QUrl(self.board_url))
+
+    def _on_deadline(self):
+        if self.last is None:
+            self._finish("timed out")
+        else:
+            self._finish(f"timed out at stroke {int(self.last[1])}/{int(self.last[3])}")
+
+    def _on_loaded(self, ok):
+        if self.finished:
+            return
+        if "first_event" in self.marks:
+            # A reload mid-draw wipes the in-page player and the board.
+            self._finish("board reloaded")
+            return
+        if not ok:
+            self._finish("load failed")
+            return
+        # Until the first event (board-link or sign-in redirects), set the
+        # player up again on the new document and hand it what it had.
+        self.page.runJavaScript(PAGE_HELPERS_JS, APP_WORLD)
+        self.player.begin()
+        self.player.start(self.speed)
+        if "loaded" in self.marks:
+            if len(self.plan):
+                self.player.append(self.plan)
+            if self.stats is not None:
+                self.player.finish()
+            return
+        self._mark("loaded")
+        worker = PathExtractor(
+            self.image, self.zone, self.tolerance, cache=StrokePlanCache(), mode=self.mode,
+            fill=self.fill, colors=self.colors, parent=self,
+        )
+        worker.batch_ready.connect(self._drain)
+        worker.timed.connect(self.timings.update)
+        worker.done.connect(self._on_extract_done)
+        worker.failed.connect(lambda message: self._finish(f"extract failed: {message}"))
+        self.extractor = worker
+        worker.start()
+        self.poll_timer.start(PLAYER_POLL_MS)
+
+    def _drain(self):
+        while True:
+            try:
+                batch = self.extractor.queue.get_nowait()
+            except queue.Empty:
+                break
+            if len(batch):
+                self._mark("first_batch")
+                self.player.append(batch)
+                self.plan = StrokePlan.concat([self.plan, batch])
+
+    def _on_extract_done(self, stats):
+        self._drain()
+        self._mark("planned")
+        self.stats = stats
+        if not len(self.plan):
+            self._finish("no drawable edges")
+            return
+        self.player.finish()
+
+    def _on_progress(self, result, _rtt_ms):
+        if not isinstance(result, list) or len(result) < 10:
+            return
+        self.last = result
+        if int(result[4]) > 0:
+            self._mark("first_event")
+        if result[0] == "done":
+            self._finish(None)
+
+    def _finish(self, error):
+        if self.finished:
+            return
+        self.finished = True
+        self.poll_timer.stop()
+        self.player.stop()
+        if self.extractor is not None:
+            self.extractor.requestInterruption()
+            self.extractor.wait(2000)
+        self._mark("finished")
+        total_s = time.monotonic() - self.started
+        draw_s = total_s - self.marks.get("loaded", 0.0) / 1000.0
+        fired = int(self.last[4]) if self.last else 0
+        st = self.stats
+        summary = {
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "ok": error is None,
+            "error": error,
+            "board": self.board_url,
+            "image": self.image,
+            "zone": [self.zone.x1, self.zone.y1, self.zone.x2, self.zone.y2],
+            "speed_pps": self.speed,
+            "mode": self.mode,
+            "fill": self.fill,
+            "colors": self.colors,
+            "backend": self.backend,
+            "from_cache": bool(self.extractor is not None and self.extractor.from_cache),
+            "strokes": len(self.plan),
+            "points": self.plan.n_points,
+            "strokes_drawn": int(self.last[1]) if self.last else 0,
+            "events": fired,
+            "events_per_sec": round(fired / draw_s, 1) if draw_s > 0 else 0.0,
+            "pen_up_travel_px": [round(st.travel_before), round(st.travel_after)] if st is not None else None,
+            "stages_ms": {k: round(v, 1) for k, v in self.timings.items()},
+            "marks_ms": self.marks,
+            "total_s": round(total_s, 3),
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "renderer_peak_rss_kb": proc_status_kb(self.page.renderProcessPid(), "VmHWM"),
+        }
+        print(json.dumps(summary, indent=2))
+        if self.summary_out:
+            # One line per run, so overnight queues can share a file.
+            with open(self.summary_out, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary) + "\n")
+        QApplication.exit(0 if error is None else 1)
+
+
+def parse_zone(text):
+    try:
+        x1, y1, x2, y2 = (int(float(v)) for v in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected x1,y1,x2,y2") from None
+    zone = DrawZone(x1, y1, x2, y2)
+    if zone.width < 3 or zone.height < 3:
+        raise argparse.ArgumentTypeError("zone must be at least 3x3 px")
+    return zone
+
+
+def parse_speed(text):
+    # A preset name in any case ("max", "very-fast") or points per second.
+    wanted = text.replace("-", " ").replace("_", " ").strip().lower()
+    for name, rate in SPEED_PRESETS.items():
+        if name.lower() == wanted:
+            return rate
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"unknown speed {text!r}") from None
+
+
+def run_headless(args):
+    if not os.path.isfile(args.image):
+        print(f"Image not found: {args.image}", file=sys.stderr)
+        return None
+    return HeadlessDraw(
+        normalize_board_url(args.board), args.image, args.zone, args.speed, args.tolerance, args.mode,
+        args.fill, args.colors, args.backend, tuple(args.viewport), args.timeout, args.summary_out,
+    )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="WhiteboardFox browser + auto draw")
+    parser.add_argument("--bench", action="store_true", help="run the offline draw benchmark and exit")
+    parser.add_argument("--bench-images", metavar="DIR", help="image corpus (default: synthetic images)")
+    parser.add_argument("--bench-out", metavar="FILE", help="also write the JSON report here")
+    parser.add_argument("--bench-presets", nargs="+", metavar="PRESET", help="speed presets to run (default: all)")
+    parser.add_argument("--bench-points", type=int, default=2000, help="max points per plan (0 = no limit)")
+    parser.add_argument("--bench-tolerance", type=float, default=SIMPLIFY_DEFAULT_TENTHS / 10.0)
+    parser.add_argument("--bench-extract", action="store_true", help="only time tiled vs single-threaded extraction")
+    parser.add_argument("--bench-zone", type=int, nargs=2, metavar=("W", "H"), default=[1900, 1000],
+                        help="zone size for --bench-extract")
+    parser.add_argument("--bench-mode", choices=sorted(EXTRACT_MODES.values()), default="outline")
+    parser.add_argument("--bench-fill", action="store_true", help="add hatch fill strokes")
+    parser.add_argument("--bench-colors", type=int, choices=sorted(COLOR_CHOICES.values()), default=0,
+                        help="draw in this many colour layers (0 = mono)")
+    parser.add_argument("--bench-backends", nargs="+", choices=sorted(INPUT_BACKENDS.values()),
+                        default=sorted(INPUT_BACKENDS.values()), help="input backends to compare (default: all)")
+    parser.add_argument("--bench-timeout", type=float, default=300.0, help="seconds per run")
+    parser.add_argument("--board", metavar="URL", help="draw --image on this board off screen, then exit")
+    parser.add_argument("--image", metavar="FILE", help="image for --board")
+    parser.add_argument("--zone", type=parse_zone, metavar="X1,Y1,X2,Y2", help="draw area for --board (CSS px)")
+    parser.add_argument("--speed", type=parse_speed, default=SPEED_PRESETS["Max"],
+                        help="speed preset (e.g. max, very-fast) or points/sec for --board")
+    parser.add_argument("--mode", choices=sorted(EXTRACT_MODES.values()), default="outline")
+    parser.add_argument("--fill", action="store_true", help="add hatch fill strokes (--board)")
+    parser.add_argument("--colors", type=int, choices=sorted(COLOR_CHOICES.values()), default=0)
+    parser.add_argument("--tolerance", type=float, default=SIMPLIFY_DEFAULT_TENTHS / 10.0)
+    parser.add_argument("--backend", choices=sorted(INPUT_BACKENDS.values()), default="js")
+    parser.add_argument("--viewport", type=int, nargs=2, metavar=("W", "H"), default=list(HEADLESS_VIEWPORT))
+    parser.add_argument("--timeout", type=float, default=3600.0, help="seconds before a --board run gives up")
+    parser.add_argument("--summary-out", metavar="FILE", help="append each --board summary as a JSON line")
+    # Anything else (e.g. -platform) is left for Qt.
+    args, qt_args = parser.parse_known_args(argv[1:])
+    if args.board and (not args.image or args.zone is None):
+        parser.error("--board needs --image and --zone")
+    return args, qt_args
+
+
 def main():
-    app = QApplication(sys.argv)
+    STARTUP.mark("imports")
+    args, qt_args = parse_args(sys.argv)
+    if args.bench_extract:
+        run_extract_benchmark(args)
+        return
+    if args.board:
+        # No window to look at; skip the compositor (-platform still wins).
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.board:
+        job = run_headless(args)
+        if job is None:
+            sys.exit(2)
+        job.start()
+        sys.exit(app.exec())
+    if args.bench:
+        bench = run_benchmark(args)
+        bench.start()
+        sys.exit(app.exec())
     win = MainWindow()
     win.show()
     sys.exit(app.exec())
@@ -10,41 +10,47 @@ if [ ! -x "$VENV_PY" ]; then
   python3 -m venv "$VENV_DIR"
 fi
 
-if ! "$VENV_PY" -m pip --version >/dev/null 2>&1; then
-  "$VENV_PY" -m ensurepip --upgrade >/dev/null 2>&1 || {
-    echo "Failed to bootstrap pip in venv."
-    echo "Install: sudo apt install python3-venv"
-    exit 1
-  }
-fi
-
-# Prefer distro packages if present; fallback to pip install in venv.
-if ! "$VENV_PY" - <<'PY'
+# One interpreter checks the modules and prints the PyQt6 plugin directory
+# (explicit, to avoid cv2 Qt plugin path conflicts). The answer is cached in
+# the venv, so warm starts launch the app directly; delete the file to re-check.
+PLUGIN_STAMP="$VENV_DIR/.wbf-qt-plugins"
+probe() {
+  "$VENV_PY" - <<'PY'
 import importlib.util
-mods = ["PyQt6", "PyQt6.QtWebEngineWidgets", "cv2"]
-ok = True
-for m in mods:
-    if importlib.util.find_spec(m) is None:
-        ok = False
-print("ok" if ok else "missing")
-raise SystemExit(0 if ok else 1)
-PY
-then
-  "$VENV_PY" -m pip install --upgrade --retries 1 --timeout 15 pip || true
-  "$VENV_PY" -m pip install --upgrade-strategy only-if-needed --retries 1 --timeout 15 PyQt6 PyQt6-WebEngine opencv-python || {
-    echo "Dependency install failed."
-    echo "Try: sudo apt install python3-pyqt6 python3-pyqt6.qtwebengine python3-opencv"
-    exit 1
-  }
-fi
-
-# Use PyQt6 plugin directory explicitly (avoid cv2 Qt plugin path conflicts).
-PYQT_PLUGINS="$("$VENV_PY" - <<'PY'
 import os
+import sys
+for m in ("PyQt6", "PyQt6.QtWebEngineWidgets", "cv2"):
+    if importlib.util.find_spec(m) is None:
+        sys.exit(1)
 import PyQt6
 print(os.path.join(os.path.dirname(PyQt6.__file__), "Qt6", "plugins"))
 PY
-)"
+}
+
+PYQT_PLUGINS=""
+if [ -f "$PLUGIN_STAMP" ]; then
+  read -r PYQT_PLUGINS < "$PLUGIN_STAMP" || true
+fi
+if [ -z "$PYQT_PLUGINS" ] || [ ! -d "$PYQT_PLUGINS" ]; then
+  # Prefer distro packages if present; fallback to pip install in venv.
+  if ! PYQT_PLUGINS="$(probe)"; then
+    if ! "$VENV_PY" -m pip --version >/dev/null 2>&1; then
+      "$VENV_PY" -m ensurepip --upgrade >/dev/null 2>&1 || {
+        echo "Failed to bootstrap pip in venv."
+        echo "Install: sudo apt install python3-venv"
+        exit 1
+      }
+    fi
+    "$VENV_PY" -m pip install --upgrade --retries 1 --timeout 15 pip || true
+    "$VENV_PY" -m pip install --upgrade-strategy only-if-needed --retries 1 --timeout 15 PyQt6 PyQt6-WebEngine opencv-python || {
+      echo "Dependency install failed."
+      echo "Try: sudo apt install python3-pyqt6 python3-pyqt6.qtwebengine python3-opencv"
+      exit 1
+    }
+    PYQT_PLUGINS="$(probe)"
+  fi
+  printf '%s\n' "$PYQT_PLUGINS" > "$PLUGIN_STAMP"
+fi
 export QT_PLUGIN_PATH="$PYQT_PLUGINS"
 export QT_QPA_PLATFORM_PLUGIN_PATH="$PYQT_PLUGINS/platforms"
 
@@ -59,4 +65,4 @@ export QTWEBENGINE_CHROMIUM_FLAGS="$QTWEBENGINE_CHROMIUM_FLAGS --ignore-gpu-bloc
 export FONTCONFIG_PATH="${FONTCONFIG_PATH:-/etc/fonts}"
 export FONTCONFIG_FILE="${FONTCONFIG_FILE:-fonts.conf}"
 
-exec "$VENV_PY" "$APP"
+exec "$VENV_PY" "$APP" "$@"